@@ -1,183 +1,713 @@
-import sys
-import importlib
-
-import time
-
-import maya.api.OpenMaya as om
-import maya.OpenMayaUI as omui
-import maya.cmds as cmds
-
-from PySide2 import QtCore
-from PySide2 import QtWidgets
-from shiboken2 import wrapInstance
-
-from Kaia_WeightTransfer import util
-importlib.reload(util)
-###--------------------------------CLASS--------------------------------------
-
-def maya_main_window():
-    """Return the Maya main window widget as a Python object"""
-    main_window_ptr = omui.MQtUtil.mainWindow()
-    
-    if sys.version_info.major >= 3: # Python 3 or higher
-        return wrapInstance(int(main_window_ptr), QtWidgets.QWidget)
-    else:
-        return wrapInstance(long(main_window_ptr), QtWidgets.QWidget)
-    
-class WeightTransferDialog(QtWidgets.QDialog, util.WeightTransferCompute):
-    def __init__(self, parent=maya_main_window()):
-        super().__init__(parent)
-        
-        self.setWindowTitle("Weight Transfer Tool")
-        self.setMinimumWidth(250)
-        
-        # Remove the ? from the dialog on Windows
-        self.setWindowFlag(QtCore.Qt.WindowContextHelpButtonHint, False)
-        
-        # self.setWindowFlags(self.windowFlags() ^ QtCore.Qt.WindowContextHelpButtonHint)
-        self.create_widgets()
-        self.create_layouts()
-        self.create_connections()
-        
-        ###
-        self.undoable = True
-        self.source_shape = None
-        self.source_weights = None
-        
-    def create_widgets(self):
-        self.discription = QtWidgets.QLabel("Transfer single weight across \nskinCluster, blendShape, nCloth, deformers.\n\nSelect an influence inside any Paint Tool.\n")
-        self.timer_lb = QtWidgets.QLabel("timer:")
-        
-        self.undoable_cb = QtWidgets.QCheckBox("Undoable")
-        self.undoable_cb.setChecked(True)
-        
-        self.copy_btn = QtWidgets.QPushButton("Copy")
-        self.paste_btn = QtWidgets.QPushButton("Paste")
-        self.paste_btn.setEnabled(False)
-        
-        self.replace_rb = QtWidgets.QRadioButton("Replace")
-        self.add_rb = QtWidgets.QRadioButton("Add")
-        self.scale_rb = QtWidgets.QRadioButton("Scale")
-        self.replace_rb.setChecked(True)
-
-    
-    def create_layouts(self):
-        
-        disc_layout = QtWidgets.QHBoxLayout()
-        disc_layout.addWidget(self.discription)
-        
-        option_layout = QtWidgets.QHBoxLayout()
-        option_layout.addWidget(self.replace_rb)
-        option_layout.addWidget(self.add_rb)
-        option_layout.addWidget(self.scale_rb)
-        
-        undoable_layout = QtWidgets.QHBoxLayout()
-        undoable_layout.addStretch()
-        undoable_layout.addWidget(self.undoable_cb)
-        
-        
-        button_layout = QtWidgets.QHBoxLayout()
-        button_layout.addWidget(self.timer_lb)
-        button_layout.addStretch()
-        button_layout.addWidget(self.copy_btn)
-        button_layout.addWidget(self.paste_btn)
-
-        
-        main_layout = QtWidgets.QVBoxLayout(self)
-        main_layout.addLayout(disc_layout)
-        main_layout.addLayout(option_layout)
-        main_layout.addLayout(undoable_layout)
-        main_layout.addLayout(button_layout)
-        
-    def create_connections(self):
-        self.undoable_cb.toggled.connect(self.undo_toggle)
-        self.copy_btn.clicked.connect(self.copy_clicked)
-        self.paste_btn.clicked.connect(self.paste_clicked)
-        
-    def undo_toggle(self, checked):
-        self.undoable = checked
-    
-    def copy_clicked(self):
-        # start timer
-        start = time.time()
-        # get selection
-        sel = om.MGlobal.getActiveSelectionList()
-        # error check & get data
-        try:
-            tool, shape, node_type, node_name, paint = self.initialCheck(sel, qCheck=True)
-        except:
-            return
-        
-        if tool == "artAttrSkin":
-            self.querySkinWeights(shape, node_name, paint)
-        elif tool == "artAttrBlendShape":
-            self.queryBlendWeights(shape, node_name, paint)
-        elif tool == "artAttrNCloth":
-            self.queryNClothWeights()
-        elif tool == "artAttr":
-            self.queryDeformerWeights(shape, node_name, node_type, paint)
-        # restore selection
-        om.MGlobal.setActiveSelectionList(sel)
-        
-        # If successfully get the shape & weights, enable paste button
-        if tool and self.source_shape and self.source_weights:
-            self.paste_btn.setEnabled(True)
-        
-        # print time(speed)
-        t = 'timer: {:.3f}s\n'.format(time.time()-start)
-        self.timer_lb.setText(t)
-        
-    def paste_clicked(self):
-        # start timer
-        start = time.time()
-        # get selection
-        sel = om.MGlobal.getActiveSelectionList()
-        # error check & get data
-        try:
-            tool, shape, node_type, node_name, paint = self.initialCheck(sel, eCheck=True)
-        except:
-            return
-        
-        cmds.undoInfo(openChunk=True)
-        
-        if tool == "artAttrSkin":
-            # if vert count is high(over 10000) paste Skin weights operation might take some time. Continue? [v]
-            shape_name = shape.fullPathName()
-            vCount = cmds.polyEvaluate(shape_name, v=True)
-            if vCount > 9999:
-                self.show_warning_dialog()
-                if self.ret == self.qm.No:
-                    cmds.undoInfo(closeChunk=True)
-                    return
-            self.editSkinWeights(shape, node_name, paint)
-        elif tool == "artAttrBlendShape":
-            self.editBlendWeights(shape, node_name, paint)
-        elif tool == "artAttrNCloth":
-            self.editNClothWeights()
-        elif tool == "artAttr":
-            self.editDeformerWeights(shape, node_name, node_type, paint)
-            
-        cmds.undoInfo(closeChunk=True)
-        
-        # restore selection
-        om.MGlobal.setActiveSelectionList(sel)
-        # print time(speed)
-        t = 'timer: {:.3f}s\n'.format(time.time()-start)
-        self.timer_lb.setText(t)
-    
-    def show_warning_dialog(self):
-        self.qm = QtWidgets.QMessageBox()
-        qm_title = "Performance Warning"
-        qm_text = "Pasting skin weight might take long time, because of normalization.\nContinue?"
-        self.ret = self.qm.warning(self, qm_title, qm_text, self.qm.Yes | self.qm.No)
-
-        
-        
-if __name__ == "__main__":
-    try:
-        test_dialog.close() # pylint: disable=E0601 # << removing the error message for this specific line
-        test_dialog.deleteLater()
-    except:
-        pass
-    test_dialog = WeightTransferDialog()
-    test_dialog.show()
+import sys
+import importlib
+
+import time
+
+import maya.api.OpenMaya as om
+import maya.OpenMayaUI as omui
+import maya.cmds as cmds
+import maya.mel as mel
+
+from PySide2 import QtCore
+from PySide2 import QtWidgets
+from shiboken2 import wrapInstance
+
+from Kaia_WeightTransfer import nodecache
+from Kaia_WeightTransfer import sparse
+from Kaia_WeightTransfer import storage
+from Kaia_WeightTransfer import clipboard
+from Kaia_WeightTransfer import topology
+from Kaia_WeightTransfer import symmetry
+from Kaia_WeightTransfer import mesh
+from Kaia_WeightTransfer import skin
+from Kaia_WeightTransfer import blendshape
+from Kaia_WeightTransfer import compare
+from Kaia_WeightTransfer import feedback
+from Kaia_WeightTransfer import skinfile
+from Kaia_WeightTransfer import blend
+from Kaia_WeightTransfer import expression
+from Kaia_WeightTransfer import access
+from Kaia_WeightTransfer import request
+from Kaia_WeightTransfer import undo
+from Kaia_WeightTransfer import history
+from Kaia_WeightTransfer import pipeline
+from Kaia_WeightTransfer import stream
+from Kaia_WeightTransfer import util
+# Remove the callbacks of the old module before it is replaced
+nodecache.clear()
+importlib.reload(nodecache)
+importlib.reload(sparse)
+importlib.reload(storage)
+importlib.reload(clipboard)
+importlib.reload(topology)
+importlib.reload(symmetry)
+importlib.reload(mesh)
+importlib.reload(skin)
+importlib.reload(blendshape)
+importlib.reload(compare)
+importlib.reload(feedback)
+importlib.reload(skinfile)
+importlib.reload(blend)
+importlib.reload(expression)
+importlib.reload(access)
+importlib.reload(request)
+importlib.reload(undo)
+importlib.reload(history)
+importlib.reload(pipeline)
+importlib.reload(stream)
+importlib.reload(util)
+###--------------------------------CLASS--------------------------------------
+
+def maya_main_window():
+    """Return the Maya main window widget as a Python object"""
+    main_window_ptr = omui.MQtUtil.mainWindow()
+    
+    if sys.version_info.major >= 3: # Python 3 or higher
+        return wrapInstance(int(main_window_ptr), QtWidgets.QWidget)
+    else:
+        return wrapInstance(long(main_window_ptr), QtWidgets.QWidget)
+    
+class WeightTransferDialog(QtWidgets.QDialog, util.WeightTransferCompute):
+    def __init__(self, parent=None):
+        # Resolved here, not as a default argument, so the package imports in mayapy without a main window
+        if parent is None:
+            parent = maya_main_window()
+        super().__init__(parent)
+        
+        self.setWindowTitle("Weight Transfer Tool")
+        self.setMinimumWidth(250)
+        
+        # Remove the ? from the dialog on Windows
+        self.setWindowFlag(QtCore.Qt.WindowContextHelpButtonHint, False)
+        
+        # self.setWindowFlags(self.windowFlags() ^ QtCore.Qt.WindowContextHelpButtonHint)
+        self.create_widgets()
+        self.create_layouts()
+        self.create_connections()
+        
+        ###
+        # QDialog.__init__ doesn't chain to the mixin: version, copied weights, history...
+        util.WeightTransferCompute.__init__(self)
+        self.undoable = True
+        self.pipeline = pipeline.Pipeline()
+        self.compared = [] # shapes showing a heatmap
+        self.filtering = 0 # background filters not written yet
+        self.precision = "float64"
+        
+    def create_widgets(self):
+        self.discription = QtWidgets.QLabel("Transfer single weight across \nskinCluster, blendShape, nCloth, deformers.\n\nSelect an influence inside any Paint Tool.\n")
+        self.timer_lb = QtWidgets.QLabel("timer:")
+        
+        self.undoable_cb = QtWidgets.QCheckBox("Undoable")
+        self.undoable_cb.setChecked(True)
+        
+        self.matrix_cb = QtWidgets.QCheckBox("Separate maps")
+        self.matrix_cb.setToolTip("Skin: copy each selected influence on its own and paste them onto influences with the same names.\n"
+                                  "blendShape: copy every target's weight map and paste them onto targets with the same names.")
+        self.background_cb = QtWidgets.QCheckBox("Background")
+        self.background_cb.setToolTip("Copy, paste & filter compute in a background thread, Maya stays usable meanwhile.\n"
+                                      "Weights are written when the computation is done. Pastes onto different meshes overlap.")
+        self.stack_cb = QtWidgets.QCheckBox("Deformer stack")
+        self.stack_cb.setToolTip("Copy the weights of every deformer on the mesh (cluster, deltaMush, tension...) in one pass\n"
+                                 "and paste them onto the deformers with the same names, or else of the same types. No Paint Tool needed.")
+        self.clamp_cb = QtWidgets.QCheckBox("Clamp")
+        self.clamp_cb.setChecked(True)
+        self.clamp_cb.setToolTip("Clamp pasted weights into 0-1.\nTurn off for maps painted above 1, like nCloth per-vertex multipliers.\n"
+                                 "uint16/uint8 copies are clamped when stored whatever this says.")
+        self.fill_cb = QtWidgets.QCheckBox("Diffuse fill")
+        self.fill_cb.setToolTip("Target vertices past the copied ones get a smooth diffusion of the pasted weights instead of 0.")
+        
+        self.precision_lb = QtWidgets.QLabel("Precision:")
+        self.precision_cmb = QtWidgets.QComboBox()
+        self.precision_cmb.addItems(list(storage.PRECISIONS))
+        self.precision_cmb.setToolTip("Storage precision of the copied weights, applied at the next Copy.\nuint16/uint8 clamp weights into 0-1.")
+        
+        self.export_btn = QtWidgets.QPushButton("Export")
+        self.import_btn = QtWidgets.QPushButton("Import")
+        self.export_btn.setEnabled(False)
+        self.share_btn = QtWidgets.QPushButton("Share")
+        self.share_btn.setToolTip("Publish the copied weights to the other Maya sessions on this machine.")
+        self.share_btn.setEnabled(False)
+        self.receive_btn = QtWidgets.QPushButton("Receive")
+        self.receive_btn.setToolTip("Take the weights another Maya session on this machine shared.")
+        
+        self.skin_lb = QtWidgets.QLabel("skinCluster:")
+        self.ratio_sb = QtWidgets.QDoubleSpinBox()
+        self.ratio_sb.setRange(0.0, 1.0)
+        self.ratio_sb.setSingleStep(0.1)
+        self.ratio_sb.setValue(1.0)
+        self.ratio_sb.setToolTip("Ratio of weight moved from the selected influences to the last selected one.")
+        self.move_btn = QtWidgets.QPushButton("Move")
+        self.move_btn.setToolTip("Move weights of the selected influences onto the last selected influence.\nLimited to selected vertices, if any.")
+        self.prune_lb = QtWidgets.QLabel("Prune:")
+        self.prune_sb = QtWidgets.QDoubleSpinBox()
+        self.prune_sb.setDecimals(3)
+        self.prune_sb.setRange(0.0, 1.0)
+        self.prune_sb.setSingleStep(0.001)
+        self.prune_sb.setToolTip("Skin paste: remove weights below this value. 0 = off.")
+        self.max_inf_lb = QtWidgets.QLabel("Max influences:")
+        self.max_inf_sb = QtWidgets.QSpinBox()
+        self.max_inf_sb.setRange(0, 32)
+        self.max_inf_sb.setToolTip("Skin paste: keep only the biggest weights per vertex. 0 = off.")
+        self.export_skin_btn = QtWidgets.QPushButton("Export All")
+        self.import_skin_btn = QtWidgets.QPushButton("Import All")
+        
+        self.filter_lb = QtWidgets.QLabel("Copied:")
+        self.filter_cmb = QtWidgets.QComboBox()
+        self.filter_cmb.addItems(topology.OPERATORS)
+        self.iterations_sb = QtWidgets.QSpinBox()
+        self.iterations_sb.setRange(1, 100)
+        self.iterations_sb.setToolTip("Iterations")
+        self.filter_btn = QtWidgets.QPushButton("Apply")
+        self.filter_btn.setToolTip("Smooth, grow, shrink or sharpen the copied weights over the source mesh.")
+        self.filter_btn.setEnabled(False)
+        
+        self.transform_le = QtWidgets.QLineEdit()
+        self.transform_le.setPlaceholderText("invert; gamma 2.2; remap 0:0 0.5:1 1:1; w * (w > 0.1)")
+        self.transform_le.setToolTip("Steps separated by ';': invert, add, subtract, multiply, min, max, gamma, threshold, clamp, remap x:y ...\n"
+                                     "Anything else is an expression of w (weight), i (vertex index) & n (vertex count).")
+        self.transform_btn = QtWidgets.QPushButton("Transform")
+        self.transform_btn.setEnabled(False)
+        
+        self.copy_btn = QtWidgets.QPushButton("Copy")
+        self.paste_btn = QtWidgets.QPushButton("Paste")
+        self.paste_btn.setEnabled(False)
+        self.compare_btn = QtWidgets.QPushButton("Compare")
+        self.compare_btn.setToolTip("Compare the copied weights with the selected meshes' weights & show the error as vertex colors.\n"
+                                    "Click again with nothing selected to remove the colors.")
+        self.compare_btn.setEnabled(False)
+        self.revert_btn = QtWidgets.QPushButton("Revert")
+        self.revert_btn.setToolTip("Put back the weights the latest paste replaced, without going through undo.")
+        self.reapply_btn = QtWidgets.QPushButton("Re-apply")
+        self.reapply_btn.setToolTip("Paste the latest reverted weights again.")
+        
+        self.mirror_lb = QtWidgets.QLabel("Mirror:")
+        self.mirror_cmb = QtWidgets.QComboBox()
+        self.mirror_cmb.addItems(["Off"] + [axis.upper() for axis in symmetry.AXES])
+        self.mirror_cmb.setToolTip("Paste the copied weights mirrored across this axis (object space).\nUse Add to keep the original side.")
+        
+        self.replace_rb = QtWidgets.QRadioButton("Replace")
+        self.add_rb = QtWidgets.QRadioButton("Add")
+        self.scale_rb = QtWidgets.QRadioButton("Scale")
+        self.replace_rb.setChecked(True)
+
+    
+    def create_layouts(self):
+        
+        disc_layout = QtWidgets.QHBoxLayout()
+        disc_layout.addWidget(self.discription)
+        
+        option_layout = QtWidgets.QHBoxLayout()
+        option_layout.addWidget(self.replace_rb)
+        option_layout.addWidget(self.add_rb)
+        option_layout.addWidget(self.scale_rb)
+        option_layout.addStretch()
+        option_layout.addWidget(self.mirror_lb)
+        option_layout.addWidget(self.mirror_cmb)
+        
+        undoable_layout = QtWidgets.QHBoxLayout()
+        undoable_layout.addWidget(self.precision_lb)
+        undoable_layout.addWidget(self.precision_cmb)
+        undoable_layout.addStretch()
+        undoable_layout.addWidget(self.matrix_cb)
+        undoable_layout.addWidget(self.stack_cb)
+        undoable_layout.addWidget(self.clamp_cb)
+        undoable_layout.addWidget(self.fill_cb)
+        undoable_layout.addWidget(self.background_cb)
+        undoable_layout.addWidget(self.undoable_cb)
+        
+        clipboard_layout = QtWidgets.QHBoxLayout()
+        clipboard_layout.addWidget(self.filter_lb)
+        clipboard_layout.addWidget(self.filter_cmb)
+        clipboard_layout.addWidget(self.iterations_sb)
+        clipboard_layout.addWidget(self.filter_btn)
+        clipboard_layout.addStretch()
+        clipboard_layout.addWidget(self.export_btn)
+        clipboard_layout.addWidget(self.import_btn)
+        clipboard_layout.addWidget(self.share_btn)
+        clipboard_layout.addWidget(self.receive_btn)
+        
+        transform_layout = QtWidgets.QHBoxLayout()
+        transform_layout.addWidget(self.transform_le)
+        transform_layout.addWidget(self.transform_btn)
+        
+        skin_layout = QtWidgets.QHBoxLayout()
+        skin_layout.addWidget(self.skin_lb)
+        skin_layout.addWidget(self.ratio_sb)
+        skin_layout.addWidget(self.move_btn)
+        skin_layout.addStretch()
+        skin_layout.addWidget(self.export_skin_btn)
+        skin_layout.addWidget(self.import_skin_btn)
+        
+        limit_layout = QtWidgets.QHBoxLayout()
+        limit_layout.addStretch()
+        limit_layout.addWidget(self.prune_lb)
+        limit_layout.addWidget(self.prune_sb)
+        limit_layout.addWidget(self.max_inf_lb)
+        limit_layout.addWidget(self.max_inf_sb)
+        
+        
+        button_layout = QtWidgets.QHBoxLayout()
+        button_layout.addWidget(self.timer_lb)
+        button_layout.addStretch()
+        button_layout.addWidget(self.compare_btn)
+        button_layout.addWidget(self.revert_btn)
+        button_layout.addWidget(self.reapply_btn)
+        button_layout.addWidget(self.copy_btn)
+        button_layout.addWidget(self.paste_btn)
+
+        
+        main_layout = QtWidgets.QVBoxLayout(self)
+        main_layout.addLayout(disc_layout)
+        main_layout.addLayout(option_layout)
+        main_layout.addLayout(undoable_layout)
+        main_layout.addLayout(clipboard_layout)
+        main_layout.addLayout(transform_layout)
+        main_layout.addLayout(skin_layout)
+        main_layout.addLayout(limit_layout)
+        main_layout.addLayout(button_layout)
+        
+    def create_connections(self):
+        self.undoable_cb.toggled.connect(self.undo_toggle)
+        self.precision_cmb.currentTextChanged.connect(self.precision_changed)
+        self.filter_btn.clicked.connect(self.filter_clicked)
+        self.transform_btn.clicked.connect(self.transform_clicked)
+        self.transform_le.returnPressed.connect(self.transform_clicked)
+        self.export_btn.clicked.connect(self.export_clicked)
+        self.import_btn.clicked.connect(self.import_clicked)
+        self.share_btn.clicked.connect(self.share_clicked)
+        self.receive_btn.clicked.connect(self.receive_clicked)
+        self.export_skin_btn.clicked.connect(self.export_skin_clicked)
+        self.import_skin_btn.clicked.connect(self.import_skin_clicked)
+        self.move_btn.clicked.connect(self.move_clicked)
+        self.copy_btn.clicked.connect(self.copy_clicked)
+        self.paste_btn.clicked.connect(self.paste_clicked)
+        self.compare_btn.clicked.connect(self.compare_clicked)
+        self.revert_btn.clicked.connect(self.revert_clicked)
+        self.reapply_btn.clicked.connect(self.reapply_clicked)
+        
+    def closeEvent(self, event):
+        # Running computations still finish & write
+        self.pipeline.shutdown()
+        super().closeEvent(event)
+        
+    def undo_toggle(self, checked):
+        self.undoable = checked
+        
+    def precision_changed(self, text):
+        # Used by the next Copy. The current copy keeps its precision, switching back & forth doesn't degrade it.
+        self.precision = text
+    
+    def initialCheck(self, sel, qCheck=False, eCheck=False):
+        # Copying is done on one mesh. Pasting may go to many meshes, each with its own deformer.
+        if qCheck and sel.length() != 1:
+            om.MGlobal.displayError("There must be only one selection.")
+            return
+        if sel.length() == 0:
+            om.MGlobal.displayError("Select at least one mesh.")
+            return
+            
+        shapes = []
+        for n in range(sel.length()):
+            # We're doing the operation on poligon shape node.
+            try:
+                current_shape = sel.getDagPath(n).extendToShape() # dag
+            except:
+                om.MGlobal.displayError("Selection must have a shape node directly parented under.")
+                return
+            
+            # Only poligon mesh! No Nurbs surface.
+            if current_shape.apiType() != 296: 
+                om.MGlobal.displayError("Selection must be a poligon mesh.")
+                return
+            
+            # When pasting the weight, is the source mesh same to the current mesh?
+            if self.source_shape and eCheck:   # if source shape is not None
+                if self.source_shape != current_shape and sel.length() == 1:
+                    om.MGlobal.displayWarning("The source mesh is not same to the target mesh. Users might get unexpected results.")
+            shapes.append(current_shape)
+        
+        # The whole deformer stack of each mesh, whatever the tool
+        if self.stack_cb.isChecked():
+            return [request.WeightTarget(current_shape, None, access.STACK, "*") for current_shape in shapes]
+        
+        # What tool are we using?
+        tool_ctx = cmds.currentCtx() # context is the instance of the tool class
+        current_tool = cmds.contextInfo(tool_ctx, q=True, c=True) # c is class type
+        
+        tool_ls = ["artAttrSkin","artAttrBlendShape", "artAttrNCloth", "artAttr"]
+        if current_tool not in tool_ls:
+            om.MGlobal.displayError("Current tool must be either Paint Skin Weights Tool, Paint Blend Shape Weights Tool, Paint nCloth Attributes Tool, or Paint Attributes Tool.")
+            return
+        
+        # What node & attribute are we painting?
+        # example: 'deltaMush.deltaMush1.weights'
+        attr_ctx = cmds.artAttrCtx(tool_ctx, q=True, asl=True)
+        if attr_ctx == '':
+            om.MGlobal.displayError("User must select an attribute to paint.")
+            return
+            
+        current_type, current_node, current_paint = attr_ctx.split(".")
+        
+        # If the user painting skin weights, we must know the specific joint name. Overriding current_paint.
+        # User might select multiple joints. 
+        if current_tool == "artAttrSkin": #Paint Skin Weights Tool
+            current_paint = mel.eval('string $selectedInfs[] = `treeView -q -si $gArtSkinInfluencesList`') # list
+            if current_paint == []:
+                om.MGlobal.displayError("An influence must be selected inside Paint Skin Weights Tool.")
+                return
+            # Pasting goes to one influence. If there's multiple inf selection, we have to query last selected influence...
+            if eCheck and len(current_paint) > 1:
+                current_paint = [mel.eval('string	$influence = $artSkinLastSelectedInfluence;')]
+                # Same to cmds.artAttrSkinPaintCtx(cmds.currentCtx(), q=True, inf=True) but faster
+        
+        # Every target mesh uses its own node of the painted type
+        targets = []
+        for current_shape in shapes:
+            node = self.find_node(current_shape, current_type, current_node)
+            if not node:
+                om.MGlobal.displayError("{0} has no {1}.".format(current_shape.partialPathName(), current_type))
+                return
+            targets.append(request.WeightTarget(current_shape, node, current_type, current_paint))
+        return targets
+    
+    def find_node(self, shape, node_type, preferred):
+        # The painted node if it deforms this shape, else the first node of the same type in its history
+        upstream = cmds.listHistory(shape.fullPathName(), pruneDagObjects=True) or []
+        nodes = cmds.ls(upstream, type=node_type)
+        if preferred in nodes:
+            return preferred
+        # DAG nodes (nClothShape) are pruned from that history: the painted one counts if it's connected to the shape
+        if preferred and cmds.objExists(preferred) and cmds.nodeType(preferred) == node_type:
+            connected = cmds.ls(cmds.listConnections(preferred, shapes=True) or [], long=True)
+            if shape.fullPathName() in connected:
+                return preferred
+        return nodes[0] if nodes else None
+    
+    def build_request(self, source=None, target=None):
+        # Read the widget state once per operation
+        if self.add_rb.isChecked():
+            mode = "add"
+        elif self.scale_rb.isChecked():
+            mode = "scale"
+        else:
+            mode = "replace"
+        
+        return request.TransferRequest(source=source, target=target, mode=mode, clamp=self.clamp_cb.isChecked(),
+                                       undoable=self.undoable, precision=self.precision, feedback=True,
+                                       matrix=self.matrix_cb.isChecked(), prune=self.prune_sb.value(),
+                                       max_influences=self.max_inf_sb.value(),
+                                       fill="diffuse" if self.fill_cb.isChecked() else "zero",
+                                       mirror=self.mirror_cmb.currentText().lower() if self.mirror_cmb.currentIndex() else None)
+        
+    def copy_clicked(self):
+        # start timer
+        start = time.time()
+        # get selection
+        sel = om.MGlobal.getActiveSelectionList()
+        # error check & get data
+        sources = self.initialCheck(sel, qCheck=True)
+        if not sources:
+            return
+        
+        source = sources[0]
+        if source.node_type == "blendShape" and self.matrix_cb.isChecked():
+            source.paint = blendshape.ALL_TARGETS
+        if self.background_cb.isChecked():
+            # Nothing to paste until the new copy is in
+            self.enable_clipboard(False)
+            self.copyAsync(self.build_request(source=source), self.pipeline, lambda buffer: self.copy_done(start))
+        else:
+            self.copy(self.build_request(source=source))
+            self.copy_done(start)
+        # restore selection
+        om.MGlobal.setActiveSelectionList(sel)
+        
+    def copy_done(self, start):
+        # If successfully get the shape & weights, enable paste button
+        if self.source_shape and self.source_weights:
+            self.enable_clipboard(True)
+        
+        # print time(speed)
+        t = 'timer: {:.3f}s\n'.format(time.time()-start)
+        self.timer_lb.setText(t)
+        
+    def enable_clipboard(self, enabled):
+        self.paste_btn.setEnabled(enabled)
+        self.compare_btn.setEnabled(enabled)
+        self.filter_btn.setEnabled(enabled)
+        self.transform_btn.setEnabled(enabled)
+        self.share_btn.setEnabled(enabled)
+        self.export_btn.setEnabled(enabled and isinstance(self.source_weights, storage.WeightBuffer))
+        
+    def paste_clicked(self):
+        # start timer
+        start = time.time()
+        # get selection
+        sel = om.MGlobal.getActiveSelectionList()
+        # error check & get data
+        targets = self.initialCheck(sel, eCheck=True)
+        if not targets:
+            return
+        
+        if self.background_cb.isChecked():
+            # One pipeline operation per target: reads & writes of one overlap the computation of the others
+            base = self.build_request()
+            for target in targets:
+                self.pasteAsync(base.withTarget(target), self.pipeline, lambda changed: self.show_timer(start))
+            om.MGlobal.setActiveSelectionList(sel)
+            return
+        
+        if len(targets) > 1:
+            # Multi-target paste: one bulk pass, validated up front
+            base = self.build_request()
+            cmds.undoInfo(openChunk=True)
+            try:
+                self.pasteMany([base.withTarget(target) for target in targets])
+            finally:
+                cmds.undoInfo(closeChunk=True)
+            
+            om.MGlobal.setActiveSelectionList(sel)
+            t = 'timer: {:.3f}s\n'.format(time.time()-start)
+            self.timer_lb.setText(t)
+            return
+        
+        target = targets[0]
+        job = self.build_request(target=target)
+        cmds.undoInfo(openChunk=True)
+        try:
+            if om.MFnMesh(target.shape).numVertices > stream.STREAM_ABOVE:
+                # Bounded memory: vertex blocks & no revert deltas, Maya undo only
+                job.record_history = False
+                self.pasteStream(job)
+            else:
+                self.paste(job)
+        finally:
+            cmds.undoInfo(closeChunk=True)
+        
+        # restore selection
+        om.MGlobal.setActiveSelectionList(sel)
+        # print time(speed)
+        t = 'timer: {:.3f}s\n'.format(time.time()-start)
+        self.timer_lb.setText(t)
+    
+    def show_timer(self, start):
+        self.timer_lb.setText('timer: {:.3f}s\n'.format(time.time()-start))
+    
+    def compare_clicked(self):
+        start = time.time()
+        sel = om.MGlobal.getActiveSelectionList()
+        if sel.length() == 0:
+            # Remove the heatmaps
+            for shape in self.compared:
+                if shape.isValid():
+                    self.clearHeatmap(shape)
+            self.compared = []
+            return
+        targets = self.initialCheck(sel, eCheck=True)
+        if not targets:
+            return
+        
+        for target in targets:
+            if self.compareWeights(self.build_request(target=target), heatmap=True):
+                self.compared.append(target.shape)
+        om.MGlobal.setActiveSelectionList(sel)
+        self.show_timer(start)
+    
+    def revert_clicked(self):
+        start = time.time()
+        cmds.undoInfo(openChunk=True)
+        self.revert(self.undoable)
+        cmds.undoInfo(closeChunk=True)
+        self.timer_lb.setText('timer: {:.3f}s\n'.format(time.time()-start))
+    
+    def reapply_clicked(self):
+        start = time.time()
+        cmds.undoInfo(openChunk=True)
+        self.reapply(self.undoable)
+        cmds.undoInfo(closeChunk=True)
+        self.timer_lb.setText('timer: {:.3f}s\n'.format(time.time()-start))
+    
+    def move_clicked(self):
+        # start timer
+        start = time.time()
+        # get selection
+        sel = om.MGlobal.getActiveSelectionList()
+        # error check & get data
+        sources = self.initialCheck(sel, qCheck=True)
+        if not sources:
+            return
+        
+        source = sources[0]
+        if source.node_type != "skinCluster" or len(source.paint) < 2:
+            om.MGlobal.displayError("Select two or more influences inside Paint Skin Weights Tool. Weights move to the last selected one.")
+            return
+        last = mel.eval('string	$influence = $artSkinLastSelectedInfluence;')
+        target = request.WeightTarget(source.shape, source.node, source.node_type, [last])
+        
+        # Limit to selected vertices, if any...
+        indices = None
+        comp_obj = sel.getComponent(0)[1]
+        if not comp_obj.isNull():
+            indices = list(om.MFnSingleIndexedComponent(comp_obj).getElements())
+        
+        self.moveSkinWeights(self.build_request(source=source, target=target), self.ratio_sb.value(), indices)
+        
+        # restore selection
+        om.MGlobal.setActiveSelectionList(sel)
+        # print time(speed)
+        t = 'timer: {:.3f}s\n'.format(time.time()-start)
+        self.timer_lb.setText(t)
+        
+    def filter_clicked(self):
+        start = time.time()
+        if self.background_cb.isChecked():
+            # Filters queue up on the copy. Nothing reads it until the last one is written.
+            self.filtering += 1
+            self.enable_clipboard(False)
+            self.filter_btn.setEnabled(True)
+            self.filterAsync(self.filter_cmb.currentText(), self.iterations_sb.value(), 0.5, self.pipeline,
+                             lambda buffer: self.filter_done(start))
+            return
+        self.filterWeights(self.filter_cmb.currentText(), self.iterations_sb.value())
+        
+        t = 'timer: {:.3f}s\n'.format(time.time()-start)
+        self.timer_lb.setText(t)
+        
+    def filter_done(self, start):
+        self.filtering -= 1
+        if not self.filtering:
+            self.enable_clipboard(bool(self.source_weights))
+        self.show_timer(start)
+        
+    def transform_clicked(self):
+        if not self.source_weights or not self.transform_le.text().strip():
+            return
+        start = time.time()
+        self.transformWeights(self.transform_le.text())
+        
+        t = 'timer: {:.3f}s\n'.format(time.time()-start)
+        self.timer_lb.setText(t)
+        
+    def export_clicked(self):
+        path = QtWidgets.QFileDialog.getSaveFileName(self, "Export Weights", "", "Weight Buffer (*.kwt)")[0]
+        if not path:
+            return
+        
+        self.source_weights.save(path)
+        om.MGlobal.displayInfo("Export weights success! ({0}, {1} bytes)".format(self.source_weights.precision, self.source_weights.nbytes))
+        
+    def import_clicked(self):
+        path = QtWidgets.QFileDialog.getOpenFileName(self, "Import Weights", "", "Weight Buffer (*.kwt)")[0]
+        if not path:
+            return
+        
+        try:
+            self.source_weights = storage.WeightBuffer.load(path)
+        except (IOError, KeyError, ValueError) as e:
+            om.MGlobal.displayError(str(e))
+            return
+        self.precision_cmb.setCurrentText(self.source_weights.precision)
+        # Imported weights don't belong to any shape in this scene
+        self.source_shape = None
+        self.filter_btn.setEnabled(False)
+        
+        self.paste_btn.setEnabled(True)
+        self.compare_btn.setEnabled(True)
+        self.transform_btn.setEnabled(True)
+        self.share_btn.setEnabled(True)
+        self.export_btn.setEnabled(True)
+        om.MGlobal.displayInfo("Import weights success!")
+    
+    def share_clicked(self):
+        # The shape's fingerprint goes along: pasting in the other session warns when the target's vertex ids may not match
+        if self.source_shape is not None:
+            fingerprint = mesh.fingerprint(self.source_shape)
+        else:
+            fingerprint = self.source_weights.metadata.get("fingerprint")
+        try:
+            clipboard.publish(self.source_weights, fingerprint)
+        except (OSError, RuntimeError) as e:
+            om.MGlobal.displayError("Share failed: {0}".format(e))
+            return
+        om.MGlobal.displayInfo("Share weights success! ({0} vertices, {1})".format(len(self.source_weights), self.source_weights.precision))
+        
+    def receive_clicked(self):
+        try:
+            buffer = clipboard.fetch()
+        except (OSError, RuntimeError, ValueError) as e:
+            om.MGlobal.displayError("Receive failed: {0}".format(e))
+            return
+        if buffer is None:
+            om.MGlobal.displayWarning("No Maya session shared weights.")
+            return
+        self.source_weights = buffer
+        self.precision_cmb.setCurrentText(buffer.precision)
+        # Received weights don't belong to any shape in this scene
+        self.source_shape = None
+        self.enable_clipboard(True)
+        self.filter_btn.setEnabled(False)
+        om.MGlobal.displayInfo("Receive {0} weights success! ({1} vertices)".format(buffer.metadata.get("node_type", ""), len(buffer)))
+    
+    def selected_skin(self):
+        # Selected mesh & its skinCluster, for the whole weight matrix export/import
+        sel = om.MGlobal.getActiveSelectionList()
+        if sel.length() != 1:
+            om.MGlobal.displayError("There must be only one selection.")
+            return None, None
+        try:
+            shape = sel.getDagPath(0).extendToShape()
+        except:
+            om.MGlobal.displayError("Selection must have a shape node directly parented under.")
+            return None, None
+        
+        skinclst = skin.findSkinCluster(shape)
+        if not skinclst:
+            om.MGlobal.displayError("{0} has no skinCluster.".format(shape.partialPathName()))
+            return None, None
+        return shape, skinclst
+        
+    def export_skin_clicked(self):
+        shape, skinclst = self.selected_skin()
+        if not skinclst:
+            return
+        path = QtWidgets.QFileDialog.getSaveFileName(self, "Export Skin Weights", "", "Skin Weights (*.kws)")[0]
+        if not path:
+            return
+        
+        start = time.time()
+        header = skinfile.exportSkin(path, shape, skinclst)
+        om.MGlobal.displayInfo("Export skin weights success! ({0} vertices, {1} influences)".format(header["fingerprint"]["vertices"], len(header["influences"])))
+        
+        t = 'timer: {:.3f}s\n'.format(time.time()-start)
+        self.timer_lb.setText(t)
+        
+    def import_skin_clicked(self):
+        shape, skinclst = self.selected_skin()
+        if not skinclst:
+            return
+        path = QtWidgets.QFileDialog.getOpenFileName(self, "Import Skin Weights", "", "Skin Weights (*.kws)")[0]
+        if not path:
+            return
+        
+        start = time.time()
+        try:
+            header = skinfile.importSkin(path, shape, skinclst)
+        except (IOError, ValueError) as e:
+            om.MGlobal.displayError(str(e))
+            return
+        om.MGlobal.displayInfo("Import skin weights success! ({0} influences) Not undoable.".format(len(header["influences"])))
+        
+        t = 'timer: {:.3f}s\n'.format(time.time()-start)
+        self.timer_lb.setText(t)
+    
+        
+        
+if __name__ == "__main__":
+    try:
+        test_dialog.close() # pylint: disable=E0601 # << removing the error message for this specific line
+        test_dialog.deleteLater()
+    except:
+        pass
+    test_dialog = WeightTransferDialog()
+    test_dialog.show()
@@ -0,0 +1,621 @@
+import numpy as np
+
+import maya.api.OpenMaya as om
+import maya.api.OpenMayaAnim as oma
+import maya.cmds as cmds
+
+from Kaia_WeightTransfer import blend
+from Kaia_WeightTransfer import blendshape
+from Kaia_WeightTransfer import feedback
+from Kaia_WeightTransfer import nodecache
+from Kaia_WeightTransfer import request
+from Kaia_WeightTransfer import skin
+from Kaia_WeightTransfer import undo
+
+
+### Weight adapters, one per kind of weight map. Every one reads & writes in bulk:
+#   read(indices=None)                  painted weights of those vertices (all by default)
+#   write(indices, values, undoable)    values as compute() returns them. One undo step when undoable.
+# Subclasses implement get(indices) & set(indices, values), the raw bulk access behind both.
+# Maya version strategies are picked once, in __init__.
+#
+# Pasting runs on top of them in three stages:
+#   prepare(indices=None)  main thread, Maya API. Pulls the current weights of those vertices (all by default) into NumPy.
+#   compute(source, req)   any thread, NumPy only. source has one row per prepared vertex. Returns a payload for commit().
+#   commit(payload, req)   main thread, Maya API. Only the changed vertices are written.
+# Payload indices are positions in the prepared vertices, globalIndices() turns them into vertex indices.
+# Adapters with STREAMS can be prepared one vertex block after another (see stream.py).
+#
+# New weight types register their node type with @register. Unregistered types fall back on the
+# weightGeometryFilter adapter for deformers & on the generic attribute adapters for anything else.
+
+ADAPTERS = {}
+
+
+def register(*node_types):
+    def decorator(cls):
+        for node_type in node_types:
+            ADAPTERS[node_type] = cls
+        return cls
+    return decorator
+
+
+def existingElements(plug):
+    # Sorted logical indices of the elements a multi plug holds
+    return np.sort(np.array(plug.getExistingArrayAttributeIndices(), dtype=np.int64))
+
+
+def readMultiPlug(plug, count, start=0, existing=None):
+    # Read elements start .. start + count - 1 of a multi float plug (e.g. baseWeights) into an array.
+    # Only the existing elements in that range are visited. existing: existingElements(plug), if already known.
+    default = om.MFnNumericAttribute(plug.attribute()).default
+    values = np.full(count, default, dtype=np.float64)
+    if existing is None:
+        existing = existingElements(plug)
+    first, last = np.searchsorted(existing, [start, start + count])
+    for i in existing[first:last].tolist():
+        values[i - start] = plug.elementByLogicalIndex(i).asFloat()
+    return values
+
+
+def readMultiPlugAt(plug, indices, existing=None):
+    # Values of the given elements. Only the range between the first & last of them is read.
+    indices = np.asarray(indices, dtype=np.int64)
+    if not len(indices):
+        return np.zeros(0, dtype=np.float64)
+    start = int(indices.min())
+    return readMultiPlug(plug, int(indices.max()) + 1 - start, start, existing)[indices - start]
+
+
+def writeMultiPlug(plug, indices, values):
+    for i, value in zip(indices.tolist(), values.tolist()):
+        plug.elementByLogicalIndex(i).setFloat(value)
+
+
+class MultiPlug():
+    # Multi float plug with one element per vertex. Its existing elements are listed once, then every read
+    # of a vertex block only slices that list: a streamed paste doesn't scan the whole multi per block.
+    # Elements set() creates are added to the list. reset() drops it, if the node may have changed since.
+    def __init__(self, plug):
+        self.plug = plug
+        self.existing = None
+
+    def reset(self):
+        self.existing = None
+
+    def get(self, indices):
+        if self.existing is None:
+            self.existing = existingElements(self.plug)
+        return readMultiPlugAt(self.plug, indices, self.existing)
+
+    def set(self, indices, values):
+        writeMultiPlug(self.plug, indices, values)
+        indices = np.asarray(indices, dtype=np.int64)
+        if self.existing is None or not len(indices):
+            return
+        pos = np.minimum(np.searchsorted(self.existing, indices), max(len(self.existing) - 1, 0))
+        created = indices if not len(self.existing) else indices[self.existing[pos] != indices]
+        if len(created):
+            self.existing = np.union1d(self.existing, created)
+
+
+def readArrayPlug(plug, count, default=0.0):
+    # Read a doubleArray plug into an array of count values. Missing data reads as default.
+    values = np.full(count, default, dtype=np.float64)
+    try:
+        data = np.array(om.MFnDoubleArrayData(plug.asMObject()).array(), dtype=np.float64)
+    except RuntimeError:
+        return values
+    n = min(len(data), count)
+    values[:n] = data[:n]
+    return values
+
+
+def writeArrayPlug(plug, values):
+    # The whole array in one plug set
+    data_obj = om.MFnDoubleArrayData().create(om.MDoubleArray(np.asarray(values, dtype=np.float64).tolist()))
+    plug.setMObject(data_obj)
+
+
+def checkPlug(plug):
+    if plug.isLocked:
+        raise RuntimeError("{0} plug is locked.".format(plug.name()))
+    if plug.isConnected:
+        raise RuntimeError("{0} plug is connected.".format(plug.name()))
+
+
+def findPlug(node, attr):
+    try:
+        return nodecache.plug(node, attr)
+    except RuntimeError:
+        raise ValueError("{0} has no attribute {1}.".format(node, attr))
+
+
+class WeightAccess():
+    # Artisan color feedback refresh after a copy or paste, if the tool has one
+    FEEDBACK = None
+    # Reads & writes a vertex block without touching the rest of the map
+    STREAMS = True
+
+    def __init__(self, target, version):
+        self.target = target
+        self.version = version
+        self.vCount = om.MFnMesh(target.shape).numVertices
+        self.old = None
+        self.block = None # prepared vertices, None for the whole mesh
+        self.multis = []  # MultiPlug of the maps read & written
+
+    def reset(self):
+        # Forget what was listed about the node. Before reusing the adapter in a later operation.
+        for multi in self.multis:
+            multi.reset()
+
+    def indices(self, indices=None):
+        if indices is None:
+            return np.arange(self.vCount, dtype=np.int64)
+        return np.asarray(indices, dtype=np.int64)
+
+    def read(self, indices=None):
+        return self.get(self.indices(indices))
+
+    def write(self, indices, values, undoable=False, old=None):
+        # old: the values being replaced, if already known
+        indices = self.indices(indices)
+        if undoable and old is None:
+            old = self.get(indices)
+        self.set(indices, values)
+        if undoable:
+            undo.recordDelta(self.set, indices, old, values)
+
+    def refresh(self, changed=None):
+        # Queued & merged, see feedback.py. changed: the vertices just written, if known. None, nothing to redraw.
+        if changed is not None and not len(changed):
+            return
+        feedback.schedule(self.FEEDBACK)
+
+    def prepare(self, indices=None):
+        self.block = None if indices is None else self.indices(indices)
+        self.old = self.read(self.block)
+        return self.old
+
+    def globalIndices(self, indices):
+        # Vertex indices of positions in the prepared vertices
+        return indices if self.block is None else self.block[indices]
+
+    def before(self, indices):
+        # Prepared values of these vertices, as set() takes them
+        return self.old[indices]
+
+    def release(self):
+        # Drop the prepared buffers
+        self.old = self.block = None
+
+    def compute(self, source, request):
+        new = blend.blend(blend.mapToTarget(source, len(self.old)), self.old, request.mode, request.clamp)
+        indices = blend.changed(new, self.old)
+        return indices, new[indices]
+
+    def commit(self, payload, request):
+        indices, values = payload
+        old = None
+        if request.undoable:
+            undo.checkMemory(undo.estimate(values))
+            old = self.before(indices)
+        self.write(self.globalIndices(indices), values, request.undoable, old)
+
+
+class MultiAttrAccess(WeightAccess):
+    # Generic multi float attribute with one element per vertex: node.attr[i]
+    def __init__(self, target, version, plug=None):
+        super().__init__(target, version)
+        self.plug = plug if plug is not None else findPlug(target.node, target.paint)
+        checkPlug(self.plug)
+        self.multi = MultiPlug(self.plug)
+        self.multis = [self.multi]
+
+    def get(self, indices):
+        return self.multi.get(indices)
+
+    def set(self, indices, values):
+        self.multi.set(indices, values)
+
+
+class DoubleArrayAccess(WeightAccess):
+    # Generic doubleArray attribute with one value per vertex (nCloth *PerVertex maps & co).
+    # The whole array is read & written through a single plug get/set, so a block costs as much as the mesh.
+    STREAMS = False
+
+    def __init__(self, target, version, plug=None):
+        super().__init__(target, version)
+        self.plug = plug if plug is not None else findPlug(target.node, target.paint)
+        checkPlug(self.plug)
+
+    def readAll(self):
+        return readArrayPlug(self.plug, self.vCount)
+
+    def get(self, indices):
+        return self.readAll()[indices]
+
+    def set(self, indices, values):
+        full = self.readAll()
+        full[indices] = values
+        writeArrayPlug(self.plug, full)
+
+
+@register("nCloth")
+class NClothAccess(DoubleArrayAccess):
+    # nCloth per-vertex map: <attr>PerVertex (doubleArray), switched by <attr>MapType.
+    # Map values multiply the <attr> value, so no map reads as 1 everywhere.
+    # The painted attribute may be given as thickness, thicknessPerVertex or thicknessMap.
+    MAP_NONE, MAP_PER_VERTEX, MAP_TEXTURE = 0, 1, 2
+
+    def __init__(self, target, version):
+        base = target.paint
+        for suffix in ("PerVertex", "MapType", "Map"):
+            if base.endswith(suffix):
+                base = base[:-len(suffix)]
+                break
+        self.base = base
+        self.map_type_plug = findPlug(target.node, base + "MapType")
+        super().__init__(target, version, findPlug(target.node, base + "PerVertex"))
+
+    def mapType(self):
+        return self.map_type_plug.asInt()
+
+    def readAll(self):
+        # Whatever map is in use, as per-vertex values
+        map_type = self.mapType()
+        if map_type == self.MAP_PER_VERTEX:
+            return readArrayPlug(self.plug, self.vCount, 1.0)
+        if map_type == self.MAP_TEXTURE:
+            return self.sampleTexture()
+        return np.ones(self.vCount, dtype=np.float64)
+
+    def sampleTexture(self):
+        # Texture alpha at each vertex's first UV. Vertices without UVs read as 1.
+        textures = cmds.listConnections("{0}.{1}Map".format(self.target.node, self.base), source=True, destination=False) or []
+        values = np.ones(self.vCount, dtype=np.float64)
+        if not textures:
+            return values
+
+        mesh_fn = om.MFnMesh(self.target.shape)
+        us, vs = (np.array(a, dtype=np.float64) for a in mesh_fn.getUVs())
+        uv_counts, uv_ids = mesh_fn.getAssignedUVs()
+        poly_counts, poly_verts = mesh_fn.getVertices()
+        if len(uv_ids) != len(poly_verts):
+            return values
+        uv_of = np.full(self.vCount, -1, dtype=np.int64)
+        uv_of[np.array(poly_verts, dtype=np.int64)[::-1]] = np.array(uv_ids, dtype=np.int64)[::-1]
+
+        mapped = np.flatnonzero(uv_of >= 0)
+        if len(mapped):
+            alpha = cmds.colorAtPoint(textures[0], output="A", u=us[uv_of[mapped]].tolist(), v=vs[uv_of[mapped]].tolist())
+            values[mapped] = alpha
+        return values
+
+    def write(self, indices, values, undoable=False, old=None):
+        # Switch the map to PerVertex first, keeping what the old map gave
+        if self.mapType() != self.MAP_PER_VERTEX:
+            current = self.readAll()
+            if undoable:
+                cmds.setAttr(self.map_type_plug.name(), self.MAP_PER_VERTEX)
+            else:
+                self.map_type_plug.setInt(self.MAP_PER_VERTEX)
+            writeArrayPlug(self.plug, current)
+            om.MGlobal.displayInfo("{0}: switched to a per-vertex map.".format(self.map_type_plug.name()))
+        super().write(indices, values, undoable, old)
+
+
+@register("blendShape")
+class BlendShapeAccess(MultiAttrAccess):
+    # One map (base, paint target or any target's weights) on the geometry index of target.shape
+    FEEDBACK = "artAttrBlendShapeValues artAttrBlendShapeContext;"
+
+    def __init__(self, target, version):
+        geometry = blendshape.geometryIndex(target.node, target.shape)
+        super().__init__(target, version, blendshape.weightPlug(target.node, geometry, target.paint))
+
+
+class MatrixAccess(WeightAccess):
+    # Several maps side by side, (vertices, maps). A row is written when any of its maps changed.
+    def compute(self, source, request):
+        # source: (vertices, maps)
+        new = blend.blend(blend.mapToTarget(source, len(self.old)), self.old, request.mode, request.clamp)
+        indices = np.flatnonzero((new != self.old).any(axis=1))
+        return indices, new[indices]
+
+
+class BlendShapeMatrixAccess(MatrixAccess):
+    # Many maps of one geometry side by side, (vertices, maps). One pass reads or writes them all.
+    # names: maps to copy, default target.paint. blendshape.ALL_TARGETS for every target.
+    # inf_map: {source map: target map} when pasting. Missing names map to themselves.
+    FEEDBACK = BlendShapeAccess.FEEDBACK
+
+    def __init__(self, target, version, names=None, inf_map=None):
+        super().__init__(target, version)
+        geometry = blendshape.geometryIndex(target.node, target.shape)
+        targets = blendshape.targetMap(target.node)
+
+        names = target.paint if names is None else names
+        if names == blendshape.ALL_TARGETS or names == [blendshape.ALL_TARGETS]:
+            names = list(targets)
+        elif isinstance(names, str):
+            names = [names]
+        inf_map = inf_map or {}
+
+        self.names = list(names)
+        self.plugs = []
+        missing = []
+        for name in self.names:
+            try:
+                plug = blendshape.weightPlug(target.node, geometry, inf_map.get(name, name), targets)
+            except ValueError:
+                missing.append(inf_map.get(name, name))
+                continue
+            checkPlug(plug)
+            self.plugs.append(plug)
+            self.multis.append(MultiPlug(plug))
+        if missing:
+            raise ValueError("Weight maps missing on {0}: {1}".format(target.node, ", ".join(missing)))
+
+    def get(self, indices):
+        matrix = np.empty((len(indices), len(self.multis)), dtype=np.float64)
+        for c, multi in enumerate(self.multis):
+            matrix[:, c] = multi.get(indices)
+        return matrix
+
+    def set(self, indices, values):
+        for c, multi in enumerate(self.multis):
+            multi.set(indices, values[:, c])
+
+
+class DeformerAccess(WeightAccess):
+    # Any weightGeometryFilter: deformer.weightList[i].weights
+    def __init__(self, target, version):
+        super().__init__(target, version)
+        geoFilter_fn = nodecache.function(target.node, oma.MFnGeometryFilter)
+        shape_obj = target.shape.node()
+        i = geoFilter_fn.indexForOutputShape(shape_obj)
+        self.plug = geoFilter_fn.findPlug("weightList", True).elementByLogicalIndex(i).child(0)
+        self.multi = MultiPlug(self.plug)
+        self.multis = [self.multi]
+
+        if version >= 2024:
+            # maya 2024 has MFnWeightGeometryFilter: whole mesh in one call
+            self.weightGeoFilter_fn = nodecache.function(target.node, oma.MFnWeightGeometryFilter)
+            self.get, self.set = self.getFunctionSet, self.setFunctionSet
+        else:
+            self.get, self.set = self.getPlug, self.setPlug
+
+    def getFunctionSet(self, indices):
+        comp_obj = skin.vertexComponent(indices)
+        return np.array(self.weightGeoFilter_fn.getWeights(self.target.shape, comp_obj), dtype=np.float64)
+
+    def setFunctionSet(self, indices, values):
+        comp_obj = skin.vertexComponent(indices)
+        self.weightGeoFilter_fn.setWeights(self.target.shape, comp_obj, om.MFloatArray(np.asarray(values).tolist()))
+
+    def getPlug(self, indices):
+        return self.multi.get(indices)
+
+    def setPlug(self, indices, values):
+        self.multi.set(indices, values)
+
+
+# Node type of a deformer stack target: node is None, paint names the deformers
+STACK = "deformerStack"
+# Deformers with several maps of their own are not part of a stack
+STACK_EXCLUDE = ("skinCluster", "blendShape")
+
+
+def stackDeformers(shape_dag):
+    # Every weightGeometryFilter deforming shape_dag, in history order
+    shape_obj = shape_dag.node()
+    deformers = []
+    for node in cmds.listHistory(shape_dag.fullPathName(), pruneDagObjects=True) or []:
+        node_type = cmds.nodeType(node)
+        if node_type in STACK_EXCLUDE or "weightGeometryFilter" not in (cmds.nodeType(node, inherited=True) or []):
+            continue
+        try:
+            nodecache.function(node, oma.MFnGeometryFilter).indexForOutputShape(shape_obj)
+        except RuntimeError:
+            continue # upstream of another shape
+        deformers.append(node)
+    return deformers
+
+
+class StackAccess(MatrixAccess):
+    # The weights map of many deformers on one mesh side by side, (vertices, deformers).
+    # Copy: target.paint picks the deformers, by name or by type ("deltaMush"), "*" for the whole stack.
+    # Paste: names are the source deformers. Each goes to the target deformer named by inf_map, or of the same
+    # name, or else to the next unused deformer of the same type in the target's history.
+    def __init__(self, target, version, names=None, inf_map=None):
+        super().__init__(target, version)
+        deformers = stackDeformers(target.shape)
+        types = {node: cmds.nodeType(node) for node in deformers}
+
+        if names is None:
+            paint = [target.paint] if isinstance(target.paint, str) else list(target.paint)
+            nodes = [node for node in deformers if "*" in paint or node in paint or types[node] in paint]
+            if not nodes:
+                raise ValueError("{0} has no deformer matching {1}.".format(target.shape.partialPathName(), ", ".join(paint)))
+            self.names = nodes
+        else:
+            self.names = list(names)
+            inf_map = inf_map or {}
+            wanted = [inf_map.get(name, name) for name in self.names]
+            # Names first, so the type fallback can't take a deformer another source names
+            nodes = []
+            for node in wanted:
+                nodes.append(node if node in deformers and node not in nodes else None)
+            missing = []
+            for num, name in enumerate(self.names):
+                if nodes[num] is not None:
+                    continue
+                # Same type, in stack order. The source node may be gone, its name alone can't match a type.
+                node_type = cmds.nodeType(name) if cmds.objExists(name) else None
+                node = next((node for node in deformers if types[node] == node_type and node not in nodes), None)
+                if node is None:
+                    missing.append(wanted[num])
+                    continue
+                nodes[num] = node
+            if missing:
+                raise ValueError("Deformers missing on {0}: {1}".format(target.shape.partialPathName(), ", ".join(missing)))
+
+        self.nodes = nodes
+        self.channels = [DeformerAccess(request.WeightTarget(target.shape, node, types[node], "weights"), version) for node in nodes]
+        self.multis = [multi for channel in self.channels for multi in channel.multis]
+
+    def get(self, indices):
+        matrix = np.empty((len(indices), len(self.channels)), dtype=np.float64)
+        for c, channel in enumerate(self.channels):
+            matrix[:, c] = channel.get(indices)
+        return matrix
+
+    def set(self, indices, values):
+        for c, channel in enumerate(self.channels):
+            channel.set(indices, values[:, c])
+
+
+@register("skinCluster")
+class SkinAccess(WeightAccess):
+    # read() gives the sum of the painted influences. Pasting targets the first one.
+    # get/set & the paste payload are whole rows: the other influences are renormalized in compute(), not by Maya.
+    def __init__(self, target, version):
+        super().__init__(target, version)
+        self.skinclst_fn = skin.getSkinFn(target.node)
+        self.inf_names = skin.influenceNames(self.skinclst_fn)
+
+        inf_map = skin.influenceMap(self.skinclst_fn)
+        self.columns = []
+        for inf in target.paint:
+            column = inf_map.get(inf, inf_map.get(skin.shortName(inf)))
+            if column is None:
+                raise ValueError("{0} is not an influence of {1}.".format(inf, target.node))
+            self.columns.append(column)
+        self.column = self.columns[0]
+        self.matrix = None
+        self.locks = None
+
+    def read(self, indices=None):
+        return skin.readWeights(self.skinclst_fn, self.target.shape, self.indices(indices), self.columns).sum(axis=1)
+
+    def get(self, indices):
+        return skin.readWeights(self.skinclst_fn, self.target.shape, indices)
+
+    def set(self, indices, rows):
+        skin.writeWeights(self.skinclst_fn, self.target.shape, indices, range(len(self.inf_names)), rows)
+
+    def readLocks(self):
+        self.locks = np.array(skin.getLocks(self.skinclst_fn), dtype=bool)
+        return self.locks
+
+    def prepare(self, indices=None):
+        self.block = None if indices is None else self.indices(indices)
+        self.matrix = self.get(self.indices(self.block))
+        self.readLocks()
+        self.old = self.matrix[:, self.column]
+        return self.old
+
+    def before(self, indices):
+        # Whole rows, like set()
+        return self.matrix[indices]
+
+    def release(self):
+        self.old = self.block = self.matrix = self.locks = None
+
+    def compute(self, source, request):
+        indices, values = super().compute(source, request)
+        rows = self.matrix[indices]
+        if request.normalize:
+            rows = blend.normalizeSkin(rows, self.column, values, self.locks)
+        else:
+            rows[:, self.column] = values
+        return self.limit(indices, rows, request)
+
+    def limit(self, indices, rows, request):
+        # Prune & cap influences on the pasted rows, in the same write.
+        # Only rows the paste touched are limited, the rest of the mesh is left as it is.
+        if not request.prune and not request.max_influences:
+            return indices, rows
+        rows = blend.limitInfluences(rows, request.prune, request.max_influences, self.locks)
+        keep = np.flatnonzero((rows != self.matrix[indices]).any(axis=1))
+        return indices[keep], rows[keep]
+
+
+class SkinMatrixAccess(SkinAccess):
+    # Several source influences onto as many target influences, one normalization pass.
+    # names: source influences, default target.paint. inf_map: {source influence: target influence}.
+    # Missing names map to themselves. read() gives one column per influence.
+    def __init__(self, target, version, names=None, inf_map=None):
+        WeightAccess.__init__(self, target, version)
+        self.names = list(target.paint if names is None else names)
+        self.skinclst_fn = skin.getSkinFn(target.node)
+        self.inf_names = skin.influenceNames(self.skinclst_fn)
+
+        inf_map = inf_map or {}
+        target_map = skin.influenceMap(self.skinclst_fn)
+        columns = []
+        missing = []
+        for name in self.names:
+            target_name = inf_map.get(name, inf_map.get(skin.shortName(name), name))
+            column = target_map.get(target_name, target_map.get(skin.shortName(target_name)))
+            if column is None:
+                missing.append(target_name)
+            columns.append(column)
+        if missing:
+            raise ValueError("Influences missing on {0}: {1}".format(target.node, ", ".join(missing)))
+        if len(set(columns)) != len(columns):
+            raise ValueError("Several source influences map to the same influence on {0}.".format(target.node))
+
+        self.columns = self.column = np.array(columns, dtype=np.int64)
+        self.matrix = None
+        self.locks = None
+
+    def read(self, indices=None):
+        return skin.readWeights(self.skinclst_fn, self.target.shape, self.indices(indices), self.columns)
+
+    def compute(self, source, request):
+        # source: (vertices, source influences)
+        new = blend.blend(blend.mapToTarget(source, len(self.old)), self.old, request.mode, request.clamp)
+        indices = np.flatnonzero((new != self.old).any(axis=1))
+        rows = self.matrix[indices]
+        if request.normalize:
+            rows = blend.normalizeSkin(rows, self.column, new[indices], self.locks)
+        else:
+            rows[:, self.column] = new[indices]
+        return self.limit(indices, rows, request)
+
+
+def attributeAccess(target):
+    # Generic adapter picked from the painted attribute's type
+    plug = findPlug(target.node, target.paint)
+    if plug.isArray:
+        return MultiAttrAccess
+    attr_obj = plug.attribute()
+    if attr_obj.hasFn(om.MFn.kTypedAttribute) and om.MFnTypedAttribute(attr_obj).attrType() == om.MFnData.kDoubleArray:
+        return DoubleArrayAccess
+    raise ValueError("{0}.{1} is not a per-vertex weight attribute.".format(target.node, target.paint))
+
+
+# Adapters for several maps side by side (matrix copy & paste)
+MATRIX_ADAPTERS = {"skinCluster": SkinMatrixAccess, "blendShape": BlendShapeMatrixAccess, STACK: StackAccess}
+
+
+def matrixAccessFor(target, version, names=None, inf_map=None):
+    if target.node_type not in MATRIX_ADAPTERS:
+        raise ValueError("Separate maps can only be copied from a skinCluster, a blendShape or a deformer stack.")
+    return MATRIX_ADAPTERS[target.node_type](target, version, names, inf_map)
+
+
+def accessFor(target, version):
+    if target.node_type == STACK:
+        # A stack target has no node: only matrixAccessFor() with the copied deformer names handles it
+        raise ValueError("Deformer stack paste needs a stack copy.")
+    cls = ADAPTERS.get(target.node_type)
+    if cls is None:
+        if "weightGeometryFilter" in (cmds.nodeType(target.node, inherited=True) or []):
+            cls = DeformerAccess
+        else:
+            cls = attributeAccess(target)
+    return cls(target, version)
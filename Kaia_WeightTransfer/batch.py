@@ -0,0 +1,265 @@
+### Headless weight transfer for mayapy.
+# Every job names its source & target explicitly, no Paint Tool or dialog involved.
+#
+# Job file (json): a list of jobs, or {"jobs": [...]}
+#   {"scene": "shot010.ma",
+#    "source": {"mesh": "body", "node": "skinCluster1", "influences": ["joint1"]},
+#    "target": {"mesh": "body", "node": "blendShape1", "attr": "baseWeights"},
+#    "mode": "replace",            # replace, add, scale
+#    "clamp": true, "normalize": true,
+#    "matrix": false,              # skin: keep each source influence separate
+#    "influence_map": {"L_arm": "R_arm"},  # matrix paste: source > target influence, default by name
+#    "prune": 0.001, "max_influences": 4,  # skin: drop small weights & cap influences per vertex, 0 = off
+#    "fill": "zero",               # or "diffuse": target verts past the source ones are diffused, not zeroed
+#    "mirror": "x",                # paste mirrored across an axis. "mirror_seed": [v1, v2] edge on the mirror line
+#    "transform": "invert; gamma 2.2",  # applied to the copied weights before the paste, see expression.py
+#    "check": 0.001,               # compare the target with the copy after the paste, true for the default tolerance.
+#                                  # Result gets the statistics, status "mismatch" when vertices are over tolerance.
+#    "block_size": 65536,          # paste in vertex blocks of this size: bounded memory on multi-million vertex meshes
+#    "output": "shot010_out.ma"}   # or "save": true to save in place
+# skinCluster ends take "influences" (target uses the first one), other nodes take "attr".
+# blendShape "attr" is baseWeights, paintTargetWeights or a target name. With "matrix": true, blendShape ends take
+# "targets": a list of target names or "*" for all of them, copied & pasted in one pass per geometry.
+# nCloth ends take the map name: {"mesh": "shirt", "node": "nClothShape1", "attr": "thickness"}
+# Deformer stack ends take "stack" instead of "node": deformer names or types, or "*" for every deformer on the mesh.
+#   {"mesh": "body", "stack": ["deltaMush", "tension", "cluster"]}  All maps are read, mapped & written in one pass,
+#   onto the target deformers with the same names or else of the same types.
+#
+# Usage:
+#   mayapy -m Kaia_WeightTransfer.batch jobs.json --workers 4 --report report.json
+# Jobs are grouped by scene. Each scene runs in its own mayapy worker process.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def loadJobs(path):
+    with open(path) as f:
+        jobs = json.load(f)
+    if isinstance(jobs, dict):
+        jobs = jobs["jobs"]
+    for num, job in enumerate(jobs):
+        job.setdefault("id", num)
+    return jobs
+
+
+def groupByScene(jobs):
+    # Keep the job order inside each scene
+    scenes = {}
+    for job in jobs:
+        scenes.setdefault(job["scene"], []).append(job)
+    return scenes
+
+
+###--------------------------------IN MAYA--------------------------------------
+
+def resolve(end):
+    # {"mesh", "node", "influences" or "attr"} or {"mesh", "stack"} > request.WeightTarget
+    import maya.api.OpenMaya as om
+    import maya.cmds as cmds
+    from Kaia_WeightTransfer import access
+    from Kaia_WeightTransfer import request
+
+    shape = om.MSelectionList().add(end["mesh"]).getDagPath(0).extendToShape()
+    if "stack" in end:
+        paint = end["stack"] if isinstance(end["stack"], str) else list(end["stack"])
+        return request.WeightTarget(shape, None, access.STACK, paint)
+    node = end["node"]
+    node_type = cmds.nodeType(node)
+
+    if node_type == "skinCluster":
+        paint = list(end["influences"])
+    elif "targets" in end:
+        paint = end["targets"] if isinstance(end["targets"], str) else list(end["targets"])
+    else:
+        paint = end.get("attr", "weights")
+    return request.WeightTarget(shape, node, node_type, paint)
+
+
+def transfer(source, target, mode="replace", precision="float64", clamp=True, normalize=True,
+             matrix=False, influence_map=None, prune=0.0, max_influences=0, fill="zero",
+             mirror=None, mirror_seed=None, transform=None, check=None, block_size=None, compute=None):
+    # Copy one weight map from source & paste it on target. Returns the compute object holding the copy.
+    # check: tolerance (or True for the default) of a comparison after the paste, in compute.report
+    # block_size: paste one vertex block at a time, see stream.py
+    from Kaia_WeightTransfer import expression
+    from Kaia_WeightTransfer import request
+    from Kaia_WeightTransfer import util
+
+    if compute is None:
+        compute = util.WeightTransferCompute()
+
+    target = resolve(target)
+    if target.node_type == "skinCluster" and not matrix:
+        target.paint = target.paint[:1]
+
+    job = request.TransferRequest(source=resolve(source), target=target, mode=mode, clamp=clamp,
+                                  normalize=normalize, precision=precision, matrix=matrix,
+                                  influence_map=influence_map, prune=prune, max_influences=max_influences,
+                                  fill=fill, mirror=mirror, mirror_seed=mirror_seed, record_history=False)
+    # Stages run directly, not through copy() & paste(): errors reach runScene() instead of the script editor
+    read, stage, write = compute.copyStages(job)
+    write(stage(read()))
+    if transform:
+        compute.replaceWeights(expression.apply(compute.source_weights.toArray(), transform))
+    if block_size:
+        compute.pasteBlocks(job, int(block_size))
+    else:
+        read, stage, write = compute.pasteStages(job)
+        write(stage(read()))
+    if check is not None and check is not False:
+        if compute.compareWeights(job, None if check is True else check) is None:
+            raise RuntimeError("The check after the paste failed, see the log.")
+    return compute
+
+
+def runScene(scene, jobs):
+    # Open the scene, run its jobs in order, save once. One result per job.
+    import maya.cmds as cmds
+
+    results = []
+    try:
+        cmds.file(scene, open=True, force=True)
+    except RuntimeError as e:
+        return [{"id": job["id"], "scene": scene, "status": "error", "error": str(e), "time": 0.0} for job in jobs]
+
+    for job in jobs:
+        start = time.time()
+        result = {"id": job["id"], "scene": scene, "status": "ok", "error": ""}
+        try:
+            compute = transfer(job["source"], job["target"], job.get("mode", "replace"), job.get("precision", "float64"),
+                               job.get("clamp", True), job.get("normalize", True),
+                               job.get("matrix", False), job.get("influence_map"),
+                               job.get("prune", 0.0), job.get("max_influences", 0), job.get("fill", "zero"),
+                               job.get("mirror"), job.get("mirror_seed"), job.get("transform"), job.get("check"),
+                               job.get("block_size"))
+            if compute.report is not None:
+                result["check"] = compute.report.summary()
+                if not compute.report.passed:
+                    result["status"] = "mismatch"
+        except Exception as e:
+            result["status"] = "error"
+            result["error"] = "{0}: {1}".format(type(e).__name__, e)
+        result["time"] = time.time() - start
+        results.append(result)
+
+    output = next((job["output"] for job in jobs if job.get("output")), None)
+    save = output or any(job.get("save") for job in jobs)
+    if save:
+        try:
+            if output:
+                cmds.file(rename=output)
+            file_type = "mayaBinary" if cmds.file(q=True, sceneName=True).endswith(".mb") else "mayaAscii"
+            cmds.file(save=True, force=True, type=file_type)
+        except RuntimeError as e:
+            for result in results:
+                result["status"] = "error"
+                result["error"] = result["error"] or "Save failed: {0}".format(e)
+
+    return results
+
+
+def worker(job_path, result_path):
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+
+    with open(job_path) as f:
+        payload = json.load(f)
+
+    results = runScene(payload["scene"], payload["jobs"])
+
+    with open(result_path, "w") as f:
+        json.dump(results, f)
+
+    maya.standalone.uninitialize()
+
+
+###--------------------------------PROCESS POOL--------------------------------------
+
+def runWorker(mayapy, scene, jobs):
+    # Launch one mayapy process for one scene & wait for its results
+    start = time.time()
+    job_fd, job_path = tempfile.mkstemp(suffix=".json")
+    result_fd, result_path = tempfile.mkstemp(suffix=".json")
+    os.close(result_fd)
+
+    with os.fdopen(job_fd, "w") as f:
+        json.dump({"scene": scene, "jobs": jobs}, f)
+
+    # The worker must import this package from the same place
+    env = dict(os.environ)
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(p for p in [package_root, env.get("PYTHONPATH")] if p)
+
+    try:
+        proc = subprocess.run([mayapy, "-m", "Kaia_WeightTransfer.batch", "--worker", job_path, result_path],
+                              env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, universal_newlines=True)
+        try:
+            with open(result_path) as f:
+                results = json.load(f)
+        except ValueError:
+            # Worker crashed before writing results
+            tail = proc.stdout.strip().splitlines()[-5:]
+            error = "mayapy exited with {0}: {1}".format(proc.returncode, " | ".join(tail))
+            results = [{"id": job["id"], "scene": scene, "status": "error", "error": error, "time": 0.0} for job in jobs]
+    finally:
+        os.remove(job_path)
+        os.remove(result_path)
+
+    for result in results:
+        result["scene_time"] = time.time() - start
+    return results
+
+
+def runJobs(jobs, workers=None, mayapy=None):
+    # Fan the jobs out, one scene per mayapy worker
+    mayapy = mayapy or sys.executable
+    workers = workers or os.cpu_count() or 1
+
+    results = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(runWorker, mayapy, scene, scene_jobs) for scene, scene_jobs in groupByScene(jobs).items()]
+        for future in futures:
+            results.extend(future.result())
+
+    return sorted(results, key=lambda r: r["id"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="Kaia_WeightTransfer.batch", description="Headless weight transfer over many scenes.")
+    parser.add_argument("jobs", nargs="?", help="job list (json)")
+    parser.add_argument("--workers", type=int, default=None, help="parallel mayapy processes (default: cpu count)")
+    parser.add_argument("--mayapy", default=None, help="mayapy executable (default: this interpreter)")
+    parser.add_argument("--report", default=None, help="write per-job results to this json file")
+    parser.add_argument("--worker", nargs=2, metavar=("JOBS", "RESULTS"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        worker(*args.worker)
+        return 0
+    if not args.jobs:
+        parser.error("a job list is required")
+
+    start = time.time()
+    results = runJobs(loadJobs(args.jobs), args.workers, args.mayapy)
+    total = time.time() - start
+
+    failed = [r for r in results if r["status"] != "ok"]
+    for r in results:
+        print("[{0}] {1:<6} {2:8.3f}s  {3}  {4}".format(r["id"], r["status"], r["time"], r["scene"], r["error"]))
+    print("{0} jobs, {1} failed, {2:.3f}s total".format(len(results), len(failed), total))
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"total_time": total, "results": results}, f, indent=2)
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
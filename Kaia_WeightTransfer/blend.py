@@ -0,0 +1,112 @@
+import numpy as np
+
+
+### Pure NumPy paste math. No Maya calls in here, so it can run in worker threads.
+
+def mapToTarget(source, vCount):
+    # Vertex i of the target takes vertex i (row i for influence matrices) of the source.
+    # Padded with 0 if source verts < target verts, truncated otherwise.
+    if len(source) == vCount:
+        return source
+    mapped = np.zeros((vCount,) + source.shape[1:], dtype=source.dtype)
+    n = min(len(source), vCount)
+    mapped[:n] = source[:n]
+    return mapped
+
+
+def blend(source, old, mode="replace", clamp=True):
+    # Combine pasted & existing weights. replace, add, scale
+    if mode == "add":
+        new = source + old
+    elif mode == "scale":
+        new = source * old
+    else:
+        new = np.array(source, dtype=np.float64)
+
+    if clamp:
+        np.clip(new, 0.0, 1.0, out=new)
+
+    # NaN source weights (unmatched mirror vertices) keep the existing weight
+    missing = np.isnan(new)
+    if missing.any():
+        new[missing] = old[missing]
+    return new
+
+
+def changed(new, old):
+    # Indices whose weight actually changes
+    return np.flatnonzero(new != old)
+
+
+def normalizeSkin(matrix, columns, values, locks):
+    # Set influence columns & renormalize the rest of each row, like skinPercent -normalize.
+    # The remainder is spread over the other unlocked influences, proportional to their current weights.
+    # matrix: (vertices, influences). columns: one column or a list. values: new weights, (vertices,) or (vertices, columns).
+    matrix = np.array(matrix, dtype=np.float64)
+    columns = np.atleast_1d(columns)
+    values = np.asarray(values, dtype=np.float64).reshape(len(matrix), len(columns))
+    locks = np.asarray(locks, dtype=bool).copy()
+    locks[columns] = False
+
+    others = np.ones(matrix.shape[1], dtype=bool)
+    others[columns] = False
+    free = others & ~locks
+
+    # The pasted weights can't take more than what the locked influences leave
+    locked_sum = matrix[:, others & locks].sum(axis=1)
+    room = np.maximum(1.0 - locked_sum, 0.0)
+    total = values.sum(axis=1)
+    over = total > room
+    values[over] *= (room[over] / total[over])[:, None]
+    remainder = room - values.sum(axis=1)
+
+    free_sum = matrix[:, free].sum(axis=1)
+    scale = np.divide(remainder, free_sum, out=np.zeros_like(remainder), where=free_sum > 0)
+    # Rows with nothing on the free influences can't give the remainder away. The pasted columns keep it.
+    stuck = (free_sum <= 0) & (remainder > 0)
+    if stuck.any():
+        pasted = values[stuck].sum(axis=1)
+        share = np.divide(values[stuck], pasted[:, None], out=np.full_like(values[stuck], 1.0 / len(columns)), where=pasted[:, None] > 0)
+        values[stuck] += share * remainder[stuck][:, None]
+
+    matrix[:, free] *= scale[:, None]
+    matrix[:, columns] = values
+    return matrix
+
+
+def limitInfluences(matrix, prune=0.0, max_influences=0, locks=None):
+    # Zero weights below prune & keep only the max_influences biggest weights per row, then renormalize.
+    # Locked influences are never removed. 0 disables either limit.
+    matrix = np.array(matrix, dtype=np.float64)
+    locks = np.zeros(matrix.shape[1], dtype=bool) if locks is None else np.asarray(locks, dtype=bool)
+    before = matrix.copy()
+
+    if prune > 0:
+        small = matrix < prune
+        small[:, locks] = False
+        # A row with every unlocked weight under prune keeps its biggest one, it would be left with no weight
+        held = (matrix[:, ~locks] > 0).any(axis=1)
+        emptied = held & ~(~small & (matrix > 0) & ~locks).any(axis=1)
+        if emptied.any():
+            biggest = np.where(locks, -np.inf, matrix).argmax(axis=1)
+            small[np.flatnonzero(emptied), biggest[emptied]] = False
+        matrix[small] = 0.0
+
+    if 0 < max_influences < matrix.shape[1]:
+        # Rank the unlocked weights. Non-zero locked ones count toward the limit but always stay.
+        ranked = np.where(locks & (matrix > 0), np.inf, matrix)
+        drop = np.argpartition(-ranked, max_influences - 1, axis=1)[:, max_influences:]
+        rows = np.arange(len(matrix))[:, None]
+        matrix[rows, drop] = np.where(locks[drop], matrix[rows, drop], 0.0)
+
+    # Renormalize the rows that lost weight over their unlocked influences
+    touched = (matrix != before).any(axis=1)
+    if touched.any():
+        block = matrix[touched]
+        locked_sum = block[:, locks].sum(axis=1)
+        free_sum = block[:, ~locks].sum(axis=1)
+        room = np.maximum(1.0 - locked_sum, 0.0)
+        scale = np.divide(room, free_sum, out=np.ones_like(room), where=free_sum > 0)
+        block[:, ~locks] *= scale[:, None]
+        matrix[touched] = block
+    return matrix
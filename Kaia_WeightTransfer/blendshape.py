@@ -0,0 +1,56 @@
+import maya.api.OpenMaya as om
+import maya.api.OpenMayaAnim as oma
+import maya.cmds as cmds
+
+from Kaia_WeightTransfer import nodecache
+
+
+### blendShape weight maps on every geometry & every target.
+# blendShape.inputTarget[geometry].baseWeights[vertex]
+# blendShape.inputTarget[geometry].paintTargetWeights[vertex]                        (the target picked in the Paint tool)
+# blendShape.inputTarget[geometry].inputTargetGroup[target].targetWeights[vertex]    (one map per target)
+# Maps are named "baseWeights", "paintTargetWeights", a target alias ("smile") or "targetWeights[3]".
+
+BASE_MAPS = ("baseWeights", "paintTargetWeights")
+# Map name standing for every target map of the node
+ALL_TARGETS = "*"
+
+
+def geometryIndex(blendShape, shape_dag):
+    # Logical inputTarget index of this shape on the blendShape
+    shape_obj = shape_dag.node()
+    try:
+        return nodecache.function(blendShape, oma.MFnGeometryFilter).indexForOutputShape(shape_obj)
+    except RuntimeError:
+        raise ValueError("{0} is not deformed by {1}.".format(shape_dag.partialPathName(), blendShape))
+
+
+def targetMap(blendShape):
+    # {target alias: target index}, in index order
+    aliases = cmds.aliasAttr(blendShape, q=True) or [] # [alias, "weight[i]", ...]
+    targets = {}
+    for alias, attr in zip(aliases[::2], aliases[1::2]):
+        if attr.startswith("weight["):
+            targets[alias] = int(attr[len("weight["):-1])
+    return dict(sorted(targets.items(), key=lambda item: item[1]))
+
+
+def targetIndex(blendShape, name, targets=None):
+    if name.startswith("targetWeights["):
+        return int(name[len("targetWeights["):-1])
+    targets = targetMap(blendShape) if targets is None else targets
+    if name not in targets:
+        raise ValueError("{0} has no target or weight map {1}.".format(blendShape, name))
+    return targets[name]
+
+
+def weightPlug(blendShape, geometry, name, targets=None):
+    # Multi float plug of one map on one geometry
+    blendShape_fn = nodecache.function(blendShape, om.MFnDependencyNode)
+    inputTarget_plug = nodecache.plug(blendShape, "inputTarget").elementByLogicalIndex(geometry)
+    if name in BASE_MAPS:
+        return inputTarget_plug.child(blendShape_fn.attribute(name))
+
+    t = targetIndex(blendShape, name, targets)
+    group_plug = inputTarget_plug.child(blendShape_fn.attribute("inputTargetGroup")).elementByLogicalIndex(t)
+    return group_plug.child(blendShape_fn.attribute("targetWeights"))
@@ -0,0 +1,224 @@
+import atexit
+import getpass
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+try:
+    from multiprocessing import shared_memory # Python 3.8+
+except ImportError:
+    shared_memory = None
+
+from Kaia_WeightTransfer import storage
+
+
+### Clipboard shared by the Maya sessions of one user on one machine, no file export/import.
+# The copy is published into a named shared memory segment (a memory mapped temp file on Python 3.7):
+#   header    magic, version, metadata size, sequence, data size, owner
+#   metadata  json: node_type, influences, fingerprint, precision, shape
+#   data      the weights as stored (precision dtype), (vertices,) or (vertices, influences), raw bytes
+# No lock: the sequence is odd while a publish writes. A reader copies the data & retries if the sequence moved.
+# The publishing session owns the segment & removes it on release() or when it exits, unless another
+# session published over it since.
+
+MAGIC = b"KWTCLIP\0"
+VERSION = 1
+_HEADER = struct.Struct("<8sIIQQQ") # magic, version, metadata size, sequence, data size, owner
+_SEQUENCE_OFFSET = 16
+_OWNER_OFFSET = 32
+READ_RETRIES = 100
+
+_owned = {} # {name: (segment, owner token)}
+
+
+def defaultName():
+    # Per user. Short: macOS caps shared memory names at 31 characters.
+    return "kwt_clip_" + re.sub(r"[^A-Za-z0-9]", "", getpass.getuser())[:16]
+
+
+class _Segment():
+    # Named shared memory, or a memory mapped file in the temp directory when shared_memory is missing.
+    # Raises FileNotFoundError when attaching to a name nobody published, FileExistsError when creating one that exists.
+    def __init__(self, name, size=0, create=False):
+        self.name = name
+        if shared_memory is not None:
+            self.shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+            # Lifetime is handled here: owner field & release(), whichever session created it
+            _untrack(self.shm)
+            self.buf = self.shm.buf
+            self.size = self.shm.size
+            return
+
+        self.shm = None
+        self.path = os.path.join(tempfile.gettempdir(), name + ".shm")
+        if create:
+            fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_RDWR)
+            os.ftruncate(fd, size)
+            self.file = os.fdopen(fd, "r+b")
+        else:
+            self.file = open(self.path, "r+b")
+        self.buf = mmap.mmap(self.file.fileno(), 0)
+        self.size = len(self.buf)
+
+    def close(self):
+        if self.shm is not None:
+            self.buf = None
+            self.shm.close()
+        else:
+            self.buf.close()
+            self.file.close()
+
+    def unlink(self):
+        try:
+            if self.shm is not None:
+                _track(self.shm) # unlink() unregisters it
+                self.shm.unlink()
+            else:
+                os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _untrack(shm):
+    # Python's resource tracker would remove the segment when this process exits, even if another session owns it now
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    except (ImportError, AttributeError, KeyError):
+        pass
+
+
+def _track(shm):
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.register(shm._name, "shared_memory")
+    except (ImportError, AttributeError):
+        pass
+
+
+def _sequence(segment):
+    return struct.unpack_from("<Q", segment.buf, _SEQUENCE_OFFSET)[0]
+
+
+def _owner(segment):
+    return struct.unpack_from("<Q", segment.buf, _OWNER_OFFSET)[0]
+
+
+def _capacity(size):
+    # Room to grow, so the next publish can reuse the segment
+    return max(1 << 20, 1 << (size - 1).bit_length())
+
+
+def _writable(name, size):
+    # A segment of at least size bytes under name, owned by this session.
+    # The kept one only if no other session published over it since: it may have been unlinked when that one exited.
+    if name in _owned and _owned[name][0].size >= size and _owner(_owned[name][0]) == _owned[name][1]:
+        return _owned[name]
+    release(name)
+    try:
+        existing = _Segment(name)
+    except FileNotFoundError:
+        existing = None
+    if existing is not None:
+        if existing.size >= size:
+            # Published by another session: taken over, the owner field tells it
+            owned = (existing, int.from_bytes(os.urandom(8), "little"))
+            _owned[name] = owned
+            return owned
+        existing.unlink()
+        existing.close()
+    try:
+        segment = _Segment(name, _capacity(size), create=True)
+    except FileExistsError:
+        raise RuntimeError("The shared clipboard is held by another Maya session & too small. Release it there.")
+    owned = (segment, int.from_bytes(os.urandom(8), "little"))
+    _owned[name] = owned
+    return owned
+
+
+def publish(buffer, fingerprint=None, name=None):
+    # Write a storage.WeightBuffer or InfluenceBuffer for the other sessions
+    name = name or defaultName()
+    data = np.ascontiguousarray(storage.quantize(buffer.toArray(), buffer.precision))
+    metadata = dict(buffer.metadata)
+    metadata.update({"precision": buffer.precision, "shape": list(data.shape), "fingerprint": fingerprint,
+                     "influences": getattr(buffer, "influences", None)})
+    metadata_bytes = json.dumps(metadata).encode("utf-8")
+    size = _HEADER.size + len(metadata_bytes) + data.nbytes
+
+    segment, owner = _writable(name, size)
+    sequence = _sequence(segment) if bytes(segment.buf[:len(MAGIC)]) == MAGIC else 0
+    sequence += 1 + sequence % 2 # odd: being written
+    struct.pack_into("<Q", segment.buf, _SEQUENCE_OFFSET, sequence)
+
+    start = _HEADER.size
+    segment.buf[start:start + len(metadata_bytes)] = metadata_bytes
+    start += len(metadata_bytes)
+    segment.buf[start:start + data.nbytes] = data.tobytes()
+    _HEADER.pack_into(segment.buf, 0, MAGIC, VERSION, len(metadata_bytes), sequence + 1, data.nbytes, owner)
+    return name
+
+
+def fetch(name=None):
+    # The published buffer, copied out of the segment. None when nothing is published.
+    name = name or defaultName()
+    try:
+        segment = _Segment(name)
+    except FileNotFoundError:
+        return None
+
+    try:
+        for _ in range(READ_RETRIES):
+            before = _sequence(segment)
+            if before % 2:
+                time.sleep(0.001)
+                continue
+            magic, version, metadata_size, sequence, data_size, owner = _HEADER.unpack_from(segment.buf, 0)
+            if magic != MAGIC:
+                return None
+            if version > VERSION:
+                raise ValueError("The shared clipboard was published by a newer version of the tool.")
+
+            start = _HEADER.size
+            metadata = json.loads(bytes(segment.buf[start:start + metadata_size]).decode("utf-8"))
+            start += metadata_size
+            dtype = storage.PRECISIONS[metadata["precision"]]
+            data = np.frombuffer(segment.buf, dtype=dtype, count=data_size // np.dtype(dtype).itemsize, offset=start).copy()
+            if _sequence(segment) == before:
+                break
+        else:
+            raise RuntimeError("The shared clipboard is being written. Try again.")
+    finally:
+        segment.close()
+
+    precision = metadata.pop("precision")
+    data = data.reshape(metadata.pop("shape"))
+    influences = metadata.pop("influences")
+    values = storage.dequantize(data)
+    if influences is not None:
+        return storage.InfluenceBuffer(values, influences, precision, metadata)
+    return storage.WeightBuffer(values, precision, metadata)
+
+
+def release(name=None):
+    # Close this session's segment. Removed unless another session published over it.
+    name = name or defaultName()
+    if name not in _owned:
+        return
+    segment, owner = _owned.pop(name)
+    ours = _owner(segment) == owner
+    if ours:
+        segment.unlink()
+    segment.close()
+
+
+@atexit.register
+def releaseAll():
+    for name in list(_owned):
+        release(name)
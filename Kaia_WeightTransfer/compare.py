@@ -0,0 +1,68 @@
+import numpy as np
+
+
+### Weight map comparison. Pure NumPy, no Maya calls.
+# Expected & actual weights are (vertices,) or (vertices, maps). Per vertex, the error is the biggest absolute
+# difference over the maps. NaN expected values (vertices a mirror didn't match) are left out.
+
+HEATMAP_LEVELS = 64
+# Temporary color set the heatmap is written into
+HEATMAP_COLOR_SET = "kaiaWeightDiff"
+# Default tolerance, on top of the copy's quantization error
+TOLERANCE = 1e-4
+
+
+class Report():
+    def __init__(self, expected, actual, tolerance=1e-4, bins=10):
+        expected = np.asarray(expected, dtype=np.float64)
+        actual = np.asarray(actual, dtype=np.float64)
+        if expected.shape != actual.shape:
+            raise ValueError("Can't compare {0} weights with {1} weights.".format(expected.shape, actual.shape))
+
+        error = np.abs(actual - expected)
+        if error.ndim > 1:
+            error = error.max(axis=1) # NaN if any map is NaN
+        valid = ~np.isnan(error)
+        self.tolerance = tolerance
+        self.count = int(valid.sum())
+        self.errors = np.where(valid, error, 0.0)
+        checked = error[valid]
+
+        self.max_error = float(checked.max()) if self.count else 0.0
+        self.mean_error = float(checked.mean()) if self.count else 0.0
+        self.over = np.flatnonzero(self.errors > tolerance)
+        self.histogram, self.edges = np.histogram(checked, bins=bins, range=(0.0, max(self.max_error, tolerance)))
+
+    @property
+    def passed(self):
+        return not len(self.over)
+
+    def summary(self):
+        # json friendly
+        return {"vertices": self.count, "max_error": self.max_error, "mean_error": self.mean_error,
+                "tolerance": self.tolerance, "over_tolerance": len(self.over),
+                "histogram": self.histogram.tolist(), "edges": self.edges.tolist()}
+
+    def __str__(self):
+        return "{0} vertices, max error {1:.6f}, mean error {2:.6f}, {3} over {4:g}".format(
+            self.count, self.max_error, self.mean_error, len(self.over), self.tolerance)
+
+
+def heatmapPalette(levels=HEATMAP_LEVELS):
+    # (levels, 4) RGBA: black at 0 error, through blue & green, to red at the top
+    t = np.linspace(0.0, 1.0, levels)
+    palette = np.empty((levels, 4), dtype=np.float64)
+    palette[:, 0] = np.clip(2.0 * t - 1.0, 0.0, 1.0)
+    palette[:, 1] = np.clip(1.0 - np.abs(2.0 * t - 1.0), 0.0, 1.0)
+    palette[:, 2] = np.clip(1.0 - 2.0 * t, 0.0, 1.0) * (t > 0)
+    palette[:, 3] = 1.0
+    return palette
+
+
+def heatmapLevels(errors, scale, tolerance=0.0, levels=HEATMAP_LEVELS):
+    # Palette index per vertex. scale: the error shown fully red. Black up to tolerance, above it never black.
+    errors = np.asarray(errors, dtype=np.float64)
+    scale = max(float(scale), 1e-12)
+    result = np.clip(np.ceil(errors / scale * (levels - 1)), 1, levels - 1).astype(np.int32)
+    result[errors <= tolerance] = 0
+    return result
@@ -0,0 +1,146 @@
+import ast
+import operator
+import sys
+
+import numpy as np
+
+
+### Transform stage between Copy & Paste. Pure NumPy, every step runs over the whole array at once.
+# A transform is a list of steps, each a list: [name, args...]
+#   [["invert"], ["gamma", 2.2], ["remap", [[0, 0], [0.5, 1], [1, 1]]], ["expr", "w * (w > 0.1)"]]
+# or the same as text, steps separated by ";", anything that isn't a step name is an expression:
+#   "invert; gamma 2.2; remap 0:0 0.5:1 1:1; w * (w > 0.1)"
+
+
+def remap(w, curve):
+    # curve: [[x, y], ...] points, linear in between. Or a lookup table: [y, ...] spread evenly over 0-1.
+    curve = np.asarray(curve, dtype=np.float64)
+    if curve.ndim == 1:
+        xs, ys = np.linspace(0.0, 1.0, len(curve)), curve
+    else:
+        order = np.argsort(curve[:, 0], kind="stable")
+        xs, ys = curve[order, 0], curve[order, 1]
+    return np.interp(w, xs, ys)
+
+
+STEPS = {
+    "invert": lambda w: 1.0 - w,
+    "add": lambda w, v: w + v,
+    "subtract": lambda w, v: w - v,
+    "multiply": lambda w, v: w * v,
+    "min": lambda w, v: np.minimum(w, v),
+    "max": lambda w, v: np.maximum(w, v),
+    "gamma": lambda w, g: np.power(np.maximum(w, 0.0), 1.0 / g), # > 1 lifts the mid weights
+    "threshold": lambda w, t: (w >= t).astype(np.float64),
+    "clamp": lambda w, low=0.0, high=1.0: np.clip(w, low, high),
+    "remap": remap,
+    "expr": lambda w, text: evaluate(text, w),
+}
+
+
+###--------------------------------EXPRESSIONS--------------------------------------
+# Arithmetic over arrays. Names: w (weights), i (vertex index), n (vertex count).
+# The tree is walked by hand, nothing goes through eval, and only the nodes below are accepted.
+
+_BINARY = {ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+           ast.Pow: operator.pow, ast.Mod: operator.mod}
+_UNARY = {ast.USub: operator.neg, ast.UAdd: operator.pos}
+_COMPARE = {ast.Lt: operator.lt, ast.LtE: operator.le, ast.Gt: operator.gt, ast.GtE: operator.ge,
+            ast.Eq: operator.eq, ast.NotEq: operator.ne}
+# Python 3.7 (Maya 2022) parses numbers as ast.Num
+_NUMBERS = (ast.Num,) if sys.version_info < (3, 8) else (ast.Constant,)
+FUNCTIONS = {
+    "abs": np.abs, "sqrt": np.sqrt, "exp": np.exp, "log": np.log, "sin": np.sin, "cos": np.cos,
+    "min": np.minimum, "max": np.maximum, "pow": np.power, "clip": np.clip, "where": np.where,
+    "step": lambda edge, x: (x >= edge).astype(np.float64),
+    "smoothstep": lambda a, b, x: (lambda t: t * t * (3.0 - 2.0 * t))(np.clip((x - a) / (b - a), 0.0, 1.0)),
+}
+
+
+def compileExpression(text):
+    # Parse & check once. Returns a function of the names dict.
+    try:
+        tree = ast.parse(text.strip(), mode="eval").body
+    except SyntaxError as e:
+        raise ValueError("Invalid expression: {0} ({1})".format(text, e.msg))
+    return _node(tree, text)
+
+
+def _node(node, text):
+    if isinstance(node, _NUMBERS):
+        value = node.n if sys.version_info < (3, 8) else node.value
+        if not isinstance(value, (int, float)) or isinstance(value, bool):
+            raise ValueError("Not allowed in expression {0}: {1}".format(text, value))
+        value = float(value)
+        return lambda names: value
+    if isinstance(node, ast.Name):
+        name = node.id
+        return lambda names: names[name]
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY:
+        op, left, right = _BINARY[type(node.op)], _node(node.left, text), _node(node.right, text)
+        return lambda names: op(left(names), right(names))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY:
+        op, operand = _UNARY[type(node.op)], _node(node.operand, text)
+        return lambda names: op(operand(names))
+    if isinstance(node, ast.Compare) and len(node.ops) == 1 and type(node.ops[0]) in _COMPARE:
+        # Comparisons give 0/1 weights, so masks multiply: w * (w > 0.5)
+        op, left, right = _COMPARE[type(node.ops[0])], _node(node.left, text), _node(node.comparators[0], text)
+        return lambda names: np.asarray(op(left(names), right(names)), dtype=np.float64)
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS and not node.keywords:
+        func, args = FUNCTIONS[node.func.id], [_node(arg, text) for arg in node.args]
+        return lambda names: func(*[arg(names) for arg in args])
+    raise ValueError("Not allowed in expression {0}: {1}".format(text, ast.dump(node)))
+
+
+def evaluate(text, w):
+    w = np.asarray(w, dtype=np.float64)
+    i = np.arange(len(w), dtype=np.float64).reshape((-1,) + (1,) * (w.ndim - 1))
+    try:
+        result = compileExpression(text)({"w": w, "i": i, "n": float(len(w))})
+    except KeyError as e:
+        raise ValueError("Unknown name in expression {0}: {1}".format(text, e.args[0]))
+    return np.broadcast_to(np.asarray(result, dtype=np.float64), w.shape).copy()
+
+
+###--------------------------------TRANSFORMS--------------------------------------
+
+def parse(text):
+    # "invert; gamma 2.2; remap 0:0 1:0.5" > [["invert"], ["gamma", 2.2], ["remap", [[0, 0], [1, 0.5]]]]
+    steps = []
+    for part in text.split(";"):
+        part = part.strip()
+        if not part:
+            continue
+        tokens = part.split()
+        name = tokens[0].lower()
+        if name == "expr":
+            steps.append(["expr", part[len(name):].strip()])
+        elif name not in STEPS:
+            steps.append(["expr", part])
+        elif name == "remap":
+            steps.append(["remap", [[float(v) for v in token.split(":")] if ":" in token else float(token) for token in tokens[1:]]])
+        else:
+            try:
+                steps.append([name] + [float(token) for token in tokens[1:]])
+            except ValueError:
+                steps.append(["expr", part])
+    return steps
+
+
+def apply(values, steps):
+    # Run the steps in order. values: (vertices,) or (vertices, influences)
+    values = np.array(values, dtype=np.float64)
+    if isinstance(steps, str):
+        steps = parse(steps)
+    for step in steps:
+        name, args = step[0], step[1:]
+        if name not in STEPS:
+            raise ValueError("Unknown transform step: {0}".format(name))
+        try:
+            values = STEPS[name](values, *args)
+        except TypeError:
+            raise ValueError("Wrong arguments for transform step: {0}".format(step))
+        except ArithmeticError as e:
+            # Python number math: gamma 0, w * (1 / 0), 2 ** 10000
+            raise ValueError("Transform step {0} failed: {1}".format(step, e))
+    return values
@@ -0,0 +1,42 @@
+import contextlib
+
+import maya.cmds as cmds
+import maya.mel as mel
+import maya.utils
+
+
+### Artisan color feedback refreshes, merged & deferred.
+# A refresh command redraws the whole painted mesh, so after a batch of writes one per command is enough.
+# schedule() queues the command until Maya is idle: every paste of a multi-target or batched operation
+# asks for it, the mesh is redrawn once. Nothing is queued while suppressed (headless runs, long scripts).
+
+_pending = []
+_suppressed = [0]
+
+
+def schedule(command):
+    if not command or _suppressed[0] or command in _pending:
+        return
+    _pending.append(command)
+    if len(_pending) == 1:
+        maya.utils.executeDeferred(flush)
+
+
+def flush():
+    # Run the queued refreshes now
+    commands = list(_pending)
+    del _pending[:]
+    if cmds.about(batch=True):
+        return
+    for command in commands:
+        mel.eval(command)
+
+
+@contextlib.contextmanager
+def suppressed():
+    # with feedback.suppressed(): ... no refresh is queued inside
+    _suppressed[0] += 1
+    try:
+        yield
+    finally:
+        _suppressed[0] -= 1
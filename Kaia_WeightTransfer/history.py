@@ -0,0 +1,98 @@
+from collections import deque
+
+import maya.api.OpenMaya as om
+
+from Kaia_WeightTransfer import undo
+
+
+### Paste snapshots, outside Maya's undo queue. Revert & re-apply are one bulk write per target.
+# Every paste keeps, for each target map it changed, the changed vertices with their values before & after,
+# packed like undo records (undo.Delta). Snapshots live in a ring buffer bounded by count & by bytes.
+
+HISTORY_SIZE = 20
+HISTORY_BUDGET = 256 << 20
+
+
+class Snapshot():
+    # One operation: (adapter, delta) per target it changed
+    def __init__(self, label):
+        self.label = label
+        self.entries = []
+        self.applied = True
+
+    def add(self, accessor, indices, before, after):
+        # The adapter is kept to write the snapshot back. Its prepared buffers are dropped, the delta has what's needed.
+        self.entries.append((accessor, undo.Delta(indices, before, after)))
+        accessor.release()
+
+    @property
+    def nbytes(self):
+        return sum(delta.nbytes for accessor, delta in self.entries)
+
+    def restore(self, after, undoable=False, feedback=False):
+        # after=False: values before the paste (revert). True: the pasted values (re-apply).
+        reset = set()
+        for accessor, delta in self.entries:
+            # The node may have changed since the paste. Once per adapter: a streamed paste has one entry per block.
+            if id(accessor) not in reset:
+                accessor.reset()
+                reset.add(id(accessor))
+            indices, before, new = delta.unpack()
+            values = new if after else before
+            current = accessor.get(indices) if undoable else None
+            accessor.set(indices, values)
+            if undoable:
+                undo.recordDelta(accessor.set, indices, current, values)
+            if feedback:
+                accessor.refresh(indices)
+        self.applied = after
+
+
+class History():
+    def __init__(self, size=HISTORY_SIZE, budget=HISTORY_BUDGET):
+        self.size = size
+        self.budget = budget
+        self.snapshots = deque()
+
+    def __len__(self):
+        return len(self.snapshots)
+
+    @property
+    def nbytes(self):
+        return sum(snapshot.nbytes for snapshot in self.snapshots)
+
+    def push(self, snapshot):
+        # Oldest snapshots go first when the ring is full or over budget
+        if not snapshot.entries:
+            return
+        if snapshot.nbytes > self.budget:
+            om.MGlobal.displayWarning("{0} is bigger than the history budget, not kept.".format(snapshot.label))
+            return
+        self.snapshots.append(snapshot)
+        total = self.nbytes
+        while len(self.snapshots) > self.size or total > self.budget:
+            total -= self.snapshots.popleft().nbytes
+
+    def clear(self):
+        self.snapshots.clear()
+
+    def revert(self, undoable=False, feedback=False):
+        # Latest applied snapshot back to its old values
+        for snapshot in reversed(self.snapshots):
+            if snapshot.applied:
+                snapshot.restore(False, undoable, feedback)
+                return snapshot
+        return None
+
+    def reapply(self, undoable=False, feedback=False):
+        # Like redo: the first reverted snapshot after the latest applied one.
+        # If the latest one is applied (paste A, revert, paste B), the latest reverted one.
+        snapshots = list(self.snapshots)
+        last = max([num for num, snapshot in enumerate(snapshots) if snapshot.applied] or [-1])
+        reverted = [snapshot for snapshot in snapshots[last + 1:] if not snapshot.applied]
+        if not reverted:
+            reverted = [snapshot for snapshot in snapshots if not snapshot.applied][-1:]
+        if not reverted:
+            return None
+        reverted[0].restore(True, undoable, feedback)
+        return reverted[0]
@@ -0,0 +1,101 @@
+import hashlib
+
+import numpy as np
+
+import maya.api.OpenMaya as om
+
+from Kaia_WeightTransfer import symmetry
+from Kaia_WeightTransfer import topology
+
+
+# Adjacency per topology hash. Same topology, same adjacency, whatever the mesh.
+_adjacency_cache = {}
+ADJACENCY_CACHE_SIZE = 8
+
+# Symmetry maps per topology, point positions, axis, tolerance & seed
+_symmetry_cache = {}
+SYMMETRY_CACHE_SIZE = 8
+SYMMETRY_TOLERANCE = 1e-3
+
+
+def _faces(shape_dag):
+    mesh_fn = om.MFnMesh(shape_dag)
+    poly_counts, poly_verts = mesh_fn.getVertices() # MIntArray, MIntArray
+    return mesh_fn, np.array(poly_counts, dtype=np.int32), np.array(poly_verts, dtype=np.int32)
+
+
+def _fingerprint(mesh_fn, poly_counts, poly_verts):
+    digest = hashlib.sha1()
+    digest.update(poly_counts.tobytes())
+    digest.update(poly_verts.tobytes())
+
+    return {"vertices": mesh_fn.numVertices,
+            "faces": mesh_fn.numPolygons,
+            "hash": digest.hexdigest()}
+
+
+def fingerprint(shape_dag):
+    # Topology fingerprint of a mesh: vertex/face counts & a hash of the face-vertex lists.
+    # Same fingerprint means vertex indices can be copied one to one.
+    return _fingerprint(*_faces(shape_dag))
+
+
+def adjacency(shape_dag):
+    # CSR vertex adjacency from one bulk getVertices call, cached by topology fingerprint
+    mesh_fn, poly_counts, poly_verts = _faces(shape_dag)
+    key = _fingerprint(mesh_fn, poly_counts, poly_verts)["hash"]
+    if key not in _adjacency_cache:
+        if len(_adjacency_cache) >= ADJACENCY_CACHE_SIZE:
+            _adjacency_cache.pop(next(iter(_adjacency_cache)))
+        _adjacency_cache[key] = topology.Adjacency.fromFaces(poly_counts, poly_verts, mesh_fn.numVertices)
+    return _adjacency_cache[key]
+
+
+def sameTopology(a, b):
+    return a["vertices"] == b["vertices"] and a["hash"] == b["hash"]
+
+
+def writeColorSet(shape_dag, name, palette, levels):
+    # Vertex colors picked from a palette: palette (colors, 4) RGBA, levels (vertices,) indices into it.
+    # One setColors & one assignColors call per mesh, no MColor per vertex. Not undoable, meant as a temporary display.
+    mesh_fn = om.MFnMesh(shape_dag)
+    if name not in mesh_fn.getColorSetNames():
+        mesh_fn.createColorSet(name, True)
+    mesh_fn.setCurrentColorSetName(name)
+    mesh_fn.setColors(om.MColorArray([om.MColor(color) for color in np.asarray(palette).tolist()]), name)
+
+    poly_counts, poly_verts = mesh_fn.getVertices()
+    ids = np.asarray(levels, dtype=np.int32)[np.array(poly_verts, dtype=np.int64)] # per face-vertex
+    mesh_fn.assignColors(om.MIntArray(ids.tolist()), name)
+    mesh_fn.findPlug("displayColors", True).setBool(True)
+
+
+def deleteColorSet(shape_dag, name):
+    mesh_fn = om.MFnMesh(shape_dag)
+    if name in mesh_fn.getColorSetNames():
+        mesh_fn.deleteColorSet(name)
+        mesh_fn.findPlug("displayColors", True).setBool(False)
+
+
+def points(shape_dag):
+    # Object space positions, (vertices, 3)
+    return np.array(om.MFnMesh(shape_dag).getPoints(om.MSpace.kObject), dtype=np.float64).reshape(-1, 4)[:, :3]
+
+
+def symmetryMap(shape_dag, axis="x", tolerance=SYMMETRY_TOLERANCE, seed=None):
+    # Vertex symmetry map, cached: repeated mirrored pastes are a single gather.
+    # Spatial match first. Vertices it can't match fall back to the topological walk from seed (an edge on the mirror line).
+    mesh_fn, poly_counts, poly_verts = _faces(shape_dag)
+    positions = points(shape_dag)
+    key = (_fingerprint(mesh_fn, poly_counts, poly_verts)["hash"], hashlib.sha1(positions.tobytes()).hexdigest(),
+           axis, tolerance, tuple(seed) if seed else None)
+
+    if key not in _symmetry_cache:
+        mapping = symmetry.spatialMap(positions, axis, tolerance)
+        unmatched = mapping < 0
+        if seed and unmatched.any():
+            mapping[unmatched] = symmetry.topologicalMap(poly_counts, poly_verts, len(mapping), seed)[unmatched]
+        if len(_symmetry_cache) >= SYMMETRY_CACHE_SIZE:
+            _symmetry_cache.pop(next(iter(_symmetry_cache)))
+        _symmetry_cache[key] = mapping
+    return _symmetry_cache[key]
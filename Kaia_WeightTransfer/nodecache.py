@@ -0,0 +1,135 @@
+import maya.api.OpenMaya as om
+
+
+### Node name resolution cache. Repeated operations on the same rig skip MSelectionList, function set & plug lookups.
+# One entry per node name: an MObjectHandle plus anything built from the node (function sets, plugs, influence maps).
+# Entries are dropped when their node is renamed or deleted, or when the scene changes.
+# A value can also watch attributes of its node: a connection or element change on them drops it
+# (a skinCluster influence map watches "matrix", so adding or removing an influence rebuilds it).
+# Values watching NAMES are dropped whenever any node is renamed (influence names & co).
+
+NAMES = "#names"
+# Attribute messages that change what a node is connected to
+STRUCTURE = (om.MNodeMessage.kConnectionMade | om.MNodeMessage.kConnectionBroken |
+             om.MNodeMessage.kAttributeArrayAdded | om.MNodeMessage.kAttributeArrayRemoved |
+             om.MNodeMessage.kAttributeAdded | om.MNodeMessage.kAttributeRemoved)
+
+_entries = {}   # {node name: _Entry}
+_names = {}     # {MObjectHandle hash: node name}
+_callbacks = []  # global callback ids, registered on first use
+
+
+class _Entry():
+    def __init__(self, name, obj):
+        self.name = name
+        self.handle = om.MObjectHandle(obj)
+        self.values = {}
+        self.watch = {}   # {key: attribute names}
+        self.callback = None
+
+    def listen(self):
+        # Attribute changed callback, only on nodes with a value watching attributes: it runs on every plug set
+        if self.callback is None:
+            self.callback = om.MNodeMessage.addAttributeChangedCallback(self.handle.object(), _attributeChanged, self)
+
+    def drop(self, watched):
+        for key in [key for key, attrs in self.watch.items() if watched in attrs]:
+            self.values.pop(key, None)
+            self.watch.pop(key, None)
+
+    def remove(self):
+        if self.callback is None:
+            return
+        try:
+            om.MMessage.removeCallback(self.callback)
+        except RuntimeError:
+            pass
+        self.callback = None
+
+
+def _attributeChanged(msg, plug, other_plug, entry):
+    if msg & STRUCTURE:
+        entry.drop(om.MFnAttribute(plug.attribute()).name)
+
+
+def _forget(node):
+    name = _names.pop(om.MObjectHandle(node).hashCode(), None)
+    entry = _entries.pop(name, None)
+    if entry is not None:
+        entry.remove()
+
+
+def _nameChanged(node, prev_name, client_data):
+    _forget(node)
+    for entry in _entries.values():
+        entry.drop(NAMES)
+
+
+def _nodeRemoved(node, client_data):
+    _forget(node)
+
+
+def _sceneChanged(client_data):
+    clear()
+
+
+def _install():
+    if _callbacks:
+        return
+    _callbacks.append(om.MNodeMessage.addNameChangedCallback(om.MObject.kNullObj, _nameChanged))
+    _callbacks.append(om.MDGMessage.addNodeRemovedCallback(_nodeRemoved, "dependNode"))
+    for message in (om.MSceneMessage.kBeforeNew, om.MSceneMessage.kBeforeOpen):
+        _callbacks.append(om.MSceneMessage.addCallback(message, _sceneChanged))
+
+
+def clear():
+    # Drop everything & remove every callback. Call before reloading this module.
+    for entry in _entries.values():
+        entry.remove()
+    _entries.clear()
+    _names.clear()
+    if _callbacks:
+        om.MMessage.removeCallbacks(_callbacks)
+        del _callbacks[:]
+
+
+def entry(name):
+    found = _entries.get(name)
+    if found is not None and found.handle.isValid():
+        return found
+    if found is not None:
+        # Deleted, or sitting in the undo queue
+        _names.pop(found.handle.hashCode(), None)
+        _entries.pop(name, None)
+        found.remove()
+
+    _install()
+    obj = om.MSelectionList().add(name).getDependNode(0) # MObject
+    found = _Entry(name, obj)
+    _entries[name] = found
+    _names[found.handle.hashCode()] = name
+    return found
+
+
+def node(name):
+    return entry(name).handle.object()
+
+
+def cached(name, key, build, watch=()):
+    # build(MObject) once per node & key, until the node or a watched attribute changes
+    found = entry(name)
+    if key not in found.values:
+        found.values[key] = build(found.handle.object())
+        found.watch[key] = tuple(watch)
+        if any(attr != NAMES for attr in watch):
+            found.listen()
+    return found.values[key]
+
+
+def function(name, fn_class):
+    # Function set of the node, e.g. function("skinCluster1", oma.MFnSkinCluster)
+    return cached(name, fn_class, fn_class)
+
+
+def plug(name, attr):
+    return cached(name, ("plug", attr), lambda obj: om.MFnDependencyNode(obj).findPlug(attr, True))
@@ -0,0 +1,66 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import maya.api.OpenMaya as om
+import maya.utils
+
+
+### Background operations: read on the main thread, compute in a worker thread, write back on the main thread.
+#   read()            main thread, Maya API. Returns what compute needs as NumPy buffers.
+#   compute(data)     worker thread, NumPy only. NumPy releases the GIL, so Maya stays interactive meanwhile.
+#   write(result)     main thread, scheduled with maya.utils.executeDeferred.
+#   failed(error)     main thread, optional. When any stage raised.
+# Operations with the same key (one target mesh, or the clipboard) run one after another: the next read waits
+# for the previous write. Different keys overlap: one computes while another reads or writes.
+# Not for mayapy batch runs, where deferred calls run right away on the calling thread.
+
+
+class Pipeline():
+    def __init__(self, workers=1):
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.queues = {} # {key: deque of waiting (read, compute, write, failed)}. A key is there while busy.
+
+    def __len__(self):
+        # Busy keys
+        return len(self.queues)
+
+    def submit(self, key, read, compute, write, failed=None):
+        if key in self.queues:
+            self.queues[key].append((read, compute, write, failed))
+            return
+        self.queues[key] = deque()
+        self.start(key, read, compute, write, failed)
+
+    def start(self, key, read, compute, write, failed=None):
+        try:
+            data = read()
+        except Exception as e:
+            self.fail(e, failed)
+            self.next(key)
+            return
+        future = self.pool.submit(compute, data)
+        # Runs on the worker thread (or here if already done). Only hands over to the main thread.
+        future.add_done_callback(lambda future: maya.utils.executeDeferred(lambda: self.finish(key, future, write, failed)))
+
+    def finish(self, key, future, write, failed=None):
+        try:
+            write(future.result())
+        except Exception as e:
+            self.fail(e, failed)
+        self.next(key)
+
+    def next(self, key):
+        queue = self.queues.get(key)
+        if queue:
+            self.start(key, *queue.popleft())
+        else:
+            self.queues.pop(key, None)
+
+    def fail(self, error, failed=None):
+        # Any error ends this operation only. The ones queued after it still run.
+        om.MGlobal.displayError("{0}: {1}".format(type(error).__name__, error))
+        if failed is not None:
+            failed(error)
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False)
@@ -0,0 +1,76 @@
+### Everything one copy or paste needs to know, resolved before the operation starts.
+# The dialog (Paint Tool context), batch.py or any script builds these. The engine never reads UI state.
+
+MODES = ("replace", "add", "scale")
+# What target vertices past the end of the copied weights get
+FILLS = ("zero", "diffuse")
+MIRRORS = (None, "x", "y", "z")
+
+
+class WeightTarget():
+    # One weight map on one mesh.
+    # node_type: "skinCluster", "blendShape", "nCloth" or any weightGeometryFilter type (cluster, deltaMush...)
+    #            "deformerStack" for the weights of many deformers at once (see access.StackAccess), node is None
+    # paint: list of influence names for skinCluster, attribute name otherwise (baseWeights, weights...)
+    #        deformer names or types for a deformer stack, "*" for all of them
+    def __init__(self, shape, node, node_type, paint):
+        self.shape = shape # MDagPath
+        self.node = node
+        self.node_type = node_type
+        self.paint = paint
+
+    def __repr__(self):
+        return "WeightTarget({0}, {1}.{2}, {3})".format(self.shape.partialPathName(), self.node_type, self.node, self.paint)
+
+
+class TransferRequest():
+    # mode: how pasted weights combine with the existing ones. replace, add, scale
+    # clamp: clamp pasted weights into 0-1
+    # normalize: renormalize the other skin influences after a paste (skinCluster only)
+    # undoable: write through undoable commands instead of the API
+    # precision: storage precision of the copied weights (see storage.PRECISIONS)
+    # feedback: refresh artisan color feedback after the operation
+    # matrix: copy several skin influences as separate columns instead of their sum
+    # influence_map: {source influence: target influence} for matrix pastes. Unlisted ones match by name.
+    # prune: skin weights below this are removed after a paste (skinCluster only, 0 = off)
+    # max_influences: keep only the biggest weights per vertex after a paste (skinCluster only, 0 = off)
+    # fill: target vertices with no copied weight get 0, or a diffusion of the neighboring pasted weights
+    # mirror: target vertex i takes the copied weight of its mirror across this axis. None = same index.
+    #         Unmatched vertices are left as they are. Add mode keeps the original side.
+    # mirror_seed: (vertex, vertex) edge on the mirror line, for a topological match where the spatial one fails
+    # record_history: keep the paste in the revert history (history.py). Off for batch & streamed pastes of
+    #                 very big meshes, whose deltas grow with the changed vertices. Maya undo is unaffected.
+    def __init__(self, source=None, target=None, mode="replace", clamp=True, normalize=True,
+                 undoable=False, precision="float64", feedback=False, matrix=False, influence_map=None,
+                 prune=0.0, max_influences=0, fill="zero", mirror=None, mirror_seed=None,
+                 record_history=True):
+        if mode not in MODES:
+            raise ValueError("Unknown paste mode: {0}".format(mode))
+        if fill not in FILLS:
+            raise ValueError("Unknown fill: {0}".format(fill))
+        if mirror not in MIRRORS:
+            raise ValueError("Unknown mirror axis: {0}".format(mirror))
+
+        self.source = source
+        self.target = target
+        self.mode = mode
+        self.clamp = clamp
+        self.normalize = normalize
+        self.undoable = undoable
+        self.precision = precision
+        self.feedback = feedback
+        self.matrix = matrix
+        self.influence_map = dict(influence_map or {})
+        self.prune = prune
+        self.max_influences = max_influences
+        self.fill = fill
+        self.mirror = mirror
+        self.mirror_seed = mirror_seed
+        self.record_history = record_history
+
+    def withTarget(self, target):
+        # Same policy, another target (multi-target paste)
+        other = TransferRequest.__new__(TransferRequest)
+        other.__dict__.update(self.__dict__)
+        other.target = target
+        return other
@@ -0,0 +1,115 @@
+import numpy as np
+
+import maya.api.OpenMaya as om
+import maya.api.OpenMayaAnim as oma
+import maya.cmds as cmds
+
+from Kaia_WeightTransfer import nodecache
+
+
+### Bulk skinCluster weight access. One API call per vertex block instead of one per vertex.
+# Influence indices here are physical indices: the position inside skinclst_fn.influenceObjects().
+
+def vertexComponent(indices):
+    # Vertex component holding the given vertex indices
+    comp_fn = om.MFnSingleIndexedComponent()
+    comp_obj = comp_fn.create(om.MFn.kMeshVertComponent)
+    comp_fn.addElements(om.MIntArray([int(i) for i in indices]))
+    return comp_obj
+
+
+def findSkinCluster(shape_dag):
+    history = cmds.listHistory(shape_dag.fullPathName(), pruneDagObjects=True) or []
+    skinclsts = cmds.ls(history, type="skinCluster")
+    if not skinclsts:
+        return None
+    return skinclsts[0]
+
+
+def getSkinFn(skinclst):
+    return nodecache.function(skinclst, oma.MFnSkinCluster)
+
+
+# Influence lists are cached per skinCluster until an influence is added, removed or renamed. Don't modify them.
+def influenceNames(skinclst_fn):
+    return nodecache.cached(skinclst_fn.name(), "influenceNames",
+                            lambda obj: [dag.partialPathName() for dag in skinclst_fn.influenceObjects()],
+                            watch=("matrix", nodecache.NAMES))
+
+
+def influenceMap(skinclst_fn):
+    # {influence name: physical index}. Both the partial path & the short name without namespace are keys.
+    def build(obj):
+        inf_map = {}
+        for num, name in enumerate(influenceNames(skinclst_fn)):
+            inf_map[name] = num
+            inf_map.setdefault(shortName(name), num)
+        return inf_map
+    return nodecache.cached(skinclst_fn.name(), "influenceMap", build, watch=("matrix", nodecache.NAMES))
+
+
+def shortName(name):
+    return name.split("|")[-1].split(":")[-1]
+
+
+def getLocks(skinclst_fn):
+    # Lock state per physical influence index
+    locks = []
+    lock_plug = nodecache.plug(skinclst_fn.name(), "lockWeights")
+    for dag in skinclst_fn.influenceObjects():
+        logical = skinclst_fn.indexForInfluenceObject(dag)
+        locks.append(lock_plug.elementByLogicalIndex(logical).asBool())
+    return locks
+
+
+def setLocks(skinclst_fn, locks):
+    # locks: {physical index: bool}. Set on the influence's lockInfluenceWeights, which drives lockWeights[i].
+    # Influences without one (not added through skinCluster) get lockWeights[i] directly.
+    influences = skinclst_fn.influenceObjects()
+    lock_plug = nodecache.plug(skinclst_fn.name(), "lockWeights")
+    for num, locked in locks.items():
+        influence_fn = om.MFnDependencyNode(influences[num].node())
+        if influence_fn.hasAttribute("lockInfluenceWeights"):
+            influence_fn.findPlug("lockInfluenceWeights", False).setBool(bool(locked))
+        else:
+            logical = skinclst_fn.indexForInfluenceObject(influences[num])
+            lock_plug.elementByLogicalIndex(logical).setBool(bool(locked))
+
+
+def readWeights(skinclst_fn, shape_dag, indices, influences=None):
+    # Read a (vertices, influences) block. influences=None reads every influence.
+    if influences is None:
+        influences = range(len(skinclst_fn.influenceObjects()))
+    influences = om.MIntArray([int(i) for i in influences])
+
+    comp_obj = vertexComponent(indices)
+    weights = skinclst_fn.getWeights(shape_dag, comp_obj, influences) # MDoubleArray, vertex major
+    return np.array(weights, dtype=np.float64).reshape(-1, len(influences))
+
+
+def writeWeights(skinclst_fn, shape_dag, indices, influences, weights, normalize=False):
+    # Write a (vertices, influences) block in one API call. Returns the old weights of the block.
+    influences = om.MIntArray([int(i) for i in influences])
+    weights = np.asarray(weights, dtype=np.float64)
+
+    comp_obj = vertexComponent(indices)
+    old_weights = skinclst_fn.setWeights(shape_dag, comp_obj, influences,
+                                         om.MDoubleArray(weights.ravel().tolist()),
+                                         normalize, True) # returnOldWeights
+    return np.array(old_weights, dtype=np.float64).reshape(len(indices), -1)
+
+
+def moveWeights(block, ratio=1.0):
+    # block: (vertices, influences). Every column but the last gives ratio of its weight to the last one.
+    # Row sums don't change, so nothing needs renormalizing.
+    block = np.array(block, dtype=np.float64)
+    moved = block[:, :-1] * ratio
+    block[:, :-1] -= moved
+    block[:, -1] += moved.sum(axis=1)
+    return block
+
+
+def blocks(count, block_size):
+    # (start, stop) vertex ranges
+    for start in range(0, count, block_size):
+        yield start, min(start + block_size, count)
@@ -0,0 +1,141 @@
+import json
+import struct
+
+import numpy as np
+
+import maya.api.OpenMaya as om
+
+from Kaia_WeightTransfer import mesh
+from Kaia_WeightTransfer import skin
+from Kaia_WeightTransfer import storage
+
+
+### Full skinCluster weight matrix in a chunked binary file.
+# Layout: magic, format version, header size, json header, then one chunk per vertex block.
+# Chunk: start vertex, vertex count, non-zero count, then the block in sparse rows
+#   uint16[vertex count] non-zero weights per vertex
+#   uint16[non-zero count] influence column (index into header["influences"])
+#   precision[non-zero count] weight value
+# Only one block is held in memory at a time, on export and on import.
+FILE_MAGIC = b"KWTS"
+FILE_VERSION = 1
+BLOCK_SIZE = 65536
+_FILE_STRUCT = struct.Struct("<4sII")
+_CHUNK_STRUCT = struct.Struct("<III")
+
+
+def _write(f, array, dtype):
+    np.asarray(array).astype(np.dtype(dtype).newbyteorder("<")).tofile(f)
+
+
+def _read(f, dtype, count, path):
+    array = np.fromfile(f, dtype=np.dtype(dtype).newbyteorder("<"), count=count)
+    if len(array) != count:
+        raise IOError("{0} is truncated.".format(path))
+    return array.astype(array.dtype.newbyteorder("="), copy=False)
+
+
+def exportSkin(path, shape_dag, skinclst, precision="float32", block_size=BLOCK_SIZE):
+    skinclst_fn = skin.getSkinFn(skinclst)
+    fingerprint = mesh.fingerprint(shape_dag)
+    vCount = fingerprint["vertices"]
+
+    header = {"skinCluster": skinclst,
+              "mesh": shape_dag.partialPathName(),
+              "fingerprint": fingerprint,
+              "influences": skin.influenceNames(skinclst_fn),
+              "locks": skin.getLocks(skinclst_fn),
+              "precision": precision,
+              "block_size": block_size}
+    header_bytes = json.dumps(header).encode("utf-8")
+
+    with open(path, "wb") as f:
+        f.write(_FILE_STRUCT.pack(FILE_MAGIC, FILE_VERSION, len(header_bytes)))
+        f.write(header_bytes)
+
+        # Stream vertex blocks: bulk read > sparse rows > disk
+        for start, stop in skin.blocks(vCount, block_size):
+            block = skin.readWeights(skinclst_fn, shape_dag, range(start, stop))
+            rows, cols = np.nonzero(block)
+            counts = np.bincount(rows, minlength=stop - start)
+
+            f.write(_CHUNK_STRUCT.pack(start, stop - start, len(cols)))
+            _write(f, counts, np.uint16)
+            _write(f, cols, np.uint16)
+            _write(f, storage.quantize(block[rows, cols], precision), storage.PRECISIONS[precision])
+
+    return header
+
+
+def readHeader(f, path):
+    magic, version, header_size = _FILE_STRUCT.unpack(f.read(_FILE_STRUCT.size))
+    if magic != FILE_MAGIC:
+        raise IOError("{0} is not a skin weight file.".format(path))
+    if version > FILE_VERSION:
+        raise IOError("{0} was written by a newer version of the tool.".format(path))
+    return json.loads(f.read(header_size).decode("utf-8"))
+
+
+def readChunks(f, header, path):
+    # Yield (start, (count, influences) block) one chunk at a time
+    inf_count = len(header["influences"])
+    dtype = storage.PRECISIONS[header["precision"]]
+
+    while True:
+        chunk = f.read(_CHUNK_STRUCT.size)
+        if not chunk:
+            return
+        if len(chunk) != _CHUNK_STRUCT.size:
+            raise IOError("{0} is truncated.".format(path))
+        start, count, nnz = _CHUNK_STRUCT.unpack(chunk)
+
+        counts = _read(f, np.uint16, count, path)
+        cols = _read(f, np.uint16, nnz, path)
+        values = storage.dequantize(_read(f, dtype, nnz, path))
+
+        block = np.zeros((count, inf_count), dtype=np.float64)
+        block[np.repeat(np.arange(count), counts), cols] = values
+        yield start, block
+
+
+def importSkin(path, shape_dag, skinclst, normalize=False, restore_locks=True):
+    skinclst_fn = skin.getSkinFn(skinclst)
+    vCount = om.MFnMesh(shape_dag).numVertices
+
+    with open(path, "rb") as f:
+        header = readHeader(f, path)
+
+        # Check the mesh...
+        fingerprint = header["fingerprint"]
+        if fingerprint["vertices"] != vCount:
+            raise ValueError("Vertex count doesn't match. File: {0}, mesh: {1}".format(fingerprint["vertices"], vCount))
+        if not mesh.sameTopology(fingerprint, mesh.fingerprint(shape_dag)):
+            om.MGlobal.displayWarning("Topology of {0} differs from the exported mesh. Weights are applied by vertex index.".format(shape_dag.partialPathName()))
+
+        # Remap influences by name...
+        inf_map = skin.influenceMap(skinclst_fn)
+        remap = []
+        missing = []
+        for name in header["influences"]:
+            num = inf_map.get(name, inf_map.get(skin.shortName(name)))
+            if num is None:
+                missing.append(name)
+            remap.append(num)
+        if missing:
+            raise ValueError("Influences missing on {0}: {1}".format(skinclst, ", ".join(missing)))
+        if len(set(remap)) != len(remap):
+            raise ValueError("Several influences of the file match the same influence on {0}.".format(skinclst))
+
+        remap = np.array(remap, dtype=np.int64)
+        target_infs = range(len(skinclst_fn.influenceObjects()))
+
+        # Stream chunks into the bulk skin writer. Influences not in the file are zeroed.
+        for start, block in readChunks(f, header, path):
+            target_block = np.zeros((len(block), len(target_infs)), dtype=np.float64)
+            target_block[:, remap] = block
+            skin.writeWeights(skinclst_fn, shape_dag, range(start, start + len(block)), target_infs, target_block, normalize)
+
+    if restore_locks:
+        skin.setLocks(skinclst_fn, dict(zip(remap.tolist(), header["locks"])))
+
+    return header
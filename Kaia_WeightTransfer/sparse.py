@@ -0,0 +1,144 @@
+import numpy as np
+
+
+# Sparse storage is picked when it takes less than this ratio of the dense size.
+DENSITY_THRESHOLD = 0.5
+# Constant runs shorter than this are cheaper as plain index/value pairs.
+MIN_RUN = 8
+
+INDEX_DTYPE = np.uint32
+
+
+class SparseWeights():
+    # Weight map that only stores the vertices whose weight is not zero.
+    # Scattered vertices are kept as index/value pairs, constant runs as start/length/value.
+    def __init__(self, count, indices, values, run_starts=None, run_lengths=None, run_values=None):
+        self.count = int(count)
+        self.indices = np.asarray(indices, dtype=INDEX_DTYPE)
+        self.values = np.asarray(values)
+        dtype = self.values.dtype
+
+        if run_starts is None:
+            run_starts, run_lengths, run_values = [], [], []
+        self.run_starts = np.asarray(run_starts, dtype=INDEX_DTYPE)
+        self.run_lengths = np.asarray(run_lengths, dtype=INDEX_DTYPE)
+        self.run_values = np.asarray(run_values, dtype=dtype)
+
+    @classmethod
+    def fromDense(cls, values, min_run=MIN_RUN):
+        values = np.asarray(values)
+        indices = np.flatnonzero(values)
+        return cls.fromPairs(len(values), indices, values[indices], min_run)
+
+    @classmethod
+    def fromPairs(cls, count, indices, values, min_run=MIN_RUN):
+        # indices must be sorted & unique (vertex iteration order)
+        indices = np.asarray(indices, dtype=np.int64)
+        values = np.asarray(values)
+        if len(indices) == 0:
+            return cls(count, indices, values)
+
+        # A new segment starts wherever the index jumps or the value changes
+        breaks = np.ones(len(indices), dtype=bool)
+        breaks[1:] = (np.diff(indices) != 1) | (values[1:] != values[:-1])
+        seg_starts = np.flatnonzero(breaks)
+        seg_lengths = np.diff(np.append(seg_starts, len(indices)))
+
+        # Long segments become runs, the rest stay as pairs
+        is_run = seg_lengths >= min_run
+        in_run = np.repeat(is_run, seg_lengths)
+
+        return cls(count,
+                   indices[~in_run],
+                   values[~in_run],
+                   indices[seg_starts[is_run]],
+                   seg_lengths[is_run],
+                   values[seg_starts[is_run]])
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+    @property
+    def nbytes(self):
+        return (self.indices.nbytes + self.values.nbytes +
+                self.run_starts.nbytes + self.run_lengths.nbytes + self.run_values.nbytes)
+
+    def runIndices(self):
+        # Expand runs to vertex indices: start + 0, 1, 2 ... length-1
+        if len(self.run_starts) == 0:
+            return np.zeros(0, dtype=np.int64)
+        lengths = self.run_lengths.astype(np.int64)
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return np.repeat(self.run_starts.astype(np.int64), lengths) + offsets
+
+    def toDense(self, count=None):
+        count = self.count if count is None else count
+        dense = np.zeros(count, dtype=self.dtype)
+
+        run_idx = self.runIndices()
+        run_val = np.repeat(self.run_values, self.run_lengths.astype(np.int64))
+        keep = run_idx < count
+        dense[run_idx[keep]] = run_val[keep]
+
+        keep = self.indices < count
+        dense[self.indices[keep]] = self.values[keep]
+        return dense
+
+    def take(self, indices):
+        # Values at the given vertices, without building the dense map. Past the end reads as 0.
+        indices = np.asarray(indices, dtype=np.int64)
+        result = np.zeros(len(indices), dtype=self.dtype)
+
+        if len(self.run_starts):
+            run = np.searchsorted(self.run_starts, indices, side="right") - 1
+            inside = run >= 0
+            inside[inside] = indices[inside] < (self.run_starts[run[inside]].astype(np.int64) +
+                                                 self.run_lengths[run[inside]])
+            result[inside] = self.run_values[run[inside]]
+
+        if len(self.indices):
+            pos = np.minimum(np.searchsorted(self.indices, indices), len(self.indices) - 1)
+            found = self.indices[pos] == indices
+            result[found] = self.values[pos[found]]
+        return result
+
+
+def compress(values, threshold=DENSITY_THRESHOLD):
+    # Pick the smaller of dense & sparse representation
+    if isinstance(values, SparseWeights):
+        sparse = values
+        dense_nbytes = sparse.count * sparse.dtype.itemsize
+    else:
+        values = np.asarray(values)
+        sparse = SparseWeights.fromDense(values)
+        dense_nbytes = values.nbytes
+
+    if sparse.nbytes < dense_nbytes * threshold:
+        return sparse
+    return values if not isinstance(values, SparseWeights) else sparse.toDense()
+
+
+def toDense(data, count=None):
+    if isinstance(data, SparseWeights):
+        return data.toDense(count)
+    if count is None or count == len(data):
+        return data
+    # Pad with zero or truncate to the requested vertex count
+    dense = np.zeros(count, dtype=data.dtype)
+    n = min(count, len(data))
+    dense[:n] = data[:n]
+    return dense
+
+
+def take(data, indices):
+    if isinstance(data, SparseWeights):
+        return data.take(indices)
+    indices = np.asarray(indices, dtype=np.int64)
+    result = np.zeros((len(indices),) + data.shape[1:], dtype=data.dtype)
+    inside = indices < len(data)
+    result[inside] = data[indices[inside]]
+    return result
@@ -0,0 +1,196 @@
+import json
+import struct
+
+import numpy as np
+
+from Kaia_WeightTransfer import sparse
+
+
+### Storage precision for copied weight buffers & clipboard files.
+# float64 : exact copy of the queried MDoubleArray. 8 bytes per vertex.
+# float32 : ~7 significant digits (relative error <= 6e-8). 4 bytes per vertex.
+# uint16  : weights quantized over [0, 1]. Absolute error <= 0.5/65535 (~7.6e-6). 2 bytes per vertex.
+# uint8   : weights quantized over [0, 1]. Absolute error <= 0.5/255 (~2.0e-3). 1 byte per vertex.
+# Quantized modes clamp weights into [0, 1] before storing. Use a float mode for weights outside that range.
+PRECISIONS = {
+    "float64": np.float64,
+    "float32": np.float32,
+    "uint16": np.uint16,
+    "uint8": np.uint8,
+}
+
+# Clipboard file layout: magic, format version, header size, then a json header and the raw buffer.
+FILE_MAGIC = b"KWTB"
+FILE_VERSION = 1
+_FILE_STRUCT = struct.Struct("<4sII")
+
+
+def errorBound(precision):
+    # Worst case absolute error of a stored weight in [0, 1] after dequantization
+    dtype = np.dtype(PRECISIONS[precision])
+    if dtype.kind == "u":
+        return 0.5 / np.iinfo(dtype).max
+    return float(np.finfo(dtype).eps) / 2
+
+
+def quantize(values, precision="float64"):
+    values = np.asarray(values, dtype=np.float64)
+    dtype = np.dtype(PRECISIONS[precision])
+
+    if dtype.kind == "u":
+        scale = np.iinfo(dtype).max
+        return np.rint(np.clip(values, 0.0, 1.0) * scale).astype(dtype)
+    return values.astype(dtype)
+
+
+def dequantize(data, dtype=np.float64):
+    data = np.asarray(data)
+
+    if data.dtype.kind == "u":
+        scale = np.iinfo(data.dtype).max
+        return data.astype(dtype) * (1.0 / scale)
+    return data.astype(dtype, copy=False)
+
+
+def _write(f, array):
+    # little endian on disk, whatever the platform
+    array.astype(array.dtype.newbyteorder("<"), copy=False).tofile(f)
+
+
+def _read(f, dtype, count, path):
+    array = np.fromfile(f, dtype=np.dtype(dtype).newbyteorder("<"), count=count)
+    if len(array) != count:
+        raise IOError("{0} is truncated.".format(path))
+    return array.astype(array.dtype.newbyteorder("="), copy=False)
+
+
+class WeightBuffer():
+    # One copied weight map, stored in the requested precision.
+    # Mostly-zero maps are kept as sparse.SparseWeights, picked automatically by size.
+    def __init__(self, values, precision="float64", metadata=None):
+        if precision not in PRECISIONS:
+            raise ValueError("Unknown storage precision: {0}".format(precision))
+
+        self.precision = precision
+        self.data = sparse.compress(quantize(values, precision))
+        self.metadata = dict(metadata or {})
+
+    def __len__(self):
+        return len(self.data)
+
+    def __bool__(self):
+        return len(self.data) > 0
+
+    @property
+    def isSparse(self):
+        return isinstance(self.data, sparse.SparseWeights)
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes
+
+    def toArray(self, dtype=np.float64, count=None):
+        # Vectorized dequantization, done once per paste.
+        # count pads with zero or truncates to the target vertex count.
+        return dequantize(sparse.toDense(self.data, count), dtype)
+
+    def take(self, indices, dtype=np.float64):
+        # Dequantized values of the given vertices only, 0 past the end. For block by block pastes.
+        return dequantize(sparse.take(self.data, indices), dtype)
+
+    def withValues(self, values):
+        # New buffer, same precision & metadata
+        return WeightBuffer(values, self.precision, self.metadata)
+
+    def save(self, path):
+        header = dict(self.metadata)
+        header["precision"] = self.precision
+        header["count"] = len(self.data)
+        if self.isSparse:
+            header["layout"] = "sparse"
+            header["pairs"] = len(self.data.indices)
+            header["runs"] = len(self.data.run_starts)
+        header_bytes = json.dumps(header).encode("utf-8")
+
+        with open(path, "wb") as f:
+            f.write(_FILE_STRUCT.pack(FILE_MAGIC, FILE_VERSION, len(header_bytes)))
+            f.write(header_bytes)
+            if self.isSparse:
+                for array in (self.data.indices, self.data.values,
+                              self.data.run_starts, self.data.run_lengths, self.data.run_values):
+                    _write(f, array)
+            else:
+                _write(f, self.data)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            magic, version, header_size = _FILE_STRUCT.unpack(f.read(_FILE_STRUCT.size))
+            if magic != FILE_MAGIC:
+                raise IOError("{0} is not a weight clipboard file.".format(path))
+            if version > FILE_VERSION:
+                raise IOError("{0} was written by a newer version of the tool.".format(path))
+
+            header = json.loads(f.read(header_size).decode("utf-8"))
+            precision = header.pop("precision")
+            count = header.pop("count")
+            layout = header.pop("layout", "dense")
+            dtype = PRECISIONS[precision]
+
+            if layout == "sparse":
+                pairs = header.pop("pairs")
+                runs = header.pop("runs")
+                data = sparse.SparseWeights(count,
+                                            _read(f, sparse.INDEX_DTYPE, pairs, path),
+                                            _read(f, dtype, pairs, path),
+                                            _read(f, sparse.INDEX_DTYPE, runs, path),
+                                            _read(f, sparse.INDEX_DTYPE, runs, path),
+                                            _read(f, dtype, runs, path))
+            else:
+                data = _read(f, dtype, count, path)
+
+        buffer = cls.__new__(cls)
+        buffer.precision = precision
+        buffer.data = data
+        buffer.metadata = header
+        return buffer
+
+
+class InfluenceBuffer():
+    # Several maps copied side by side (skin influences, blendShape targets), one WeightBuffer per column.
+    def __init__(self, matrix, influences, precision="float64", metadata=None):
+        matrix = np.asarray(matrix, dtype=np.float64).reshape(-1, len(influences))
+        self.influences = list(influences)
+        self.precision = precision
+        self.columns = [WeightBuffer(matrix[:, c], precision) for c in range(len(influences))]
+        self.metadata = dict(metadata or {})
+        self.count = len(matrix)
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self.columns)
+
+    def toArray(self, dtype=np.float64, count=None):
+        # (vertices, influences)
+        count = self.count if count is None else count
+        matrix = np.empty((count, len(self.columns)), dtype=dtype)
+        for c, column in enumerate(self.columns):
+            matrix[:, c] = column.toArray(dtype, count)
+        return matrix
+
+    def take(self, indices, dtype=np.float64):
+        # (given vertices, influences)
+        matrix = np.empty((len(indices), len(self.columns)), dtype=dtype)
+        for c, column in enumerate(self.columns):
+            matrix[:, c] = column.take(indices, dtype)
+        return matrix
+
+    def withValues(self, values):
+        # New buffer, same influences, precision & metadata
+        return InfluenceBuffer(values, self.influences, self.precision, self.metadata)
@@ -0,0 +1,59 @@
+import numpy as np
+
+from Kaia_WeightTransfer import skin
+
+
+### Pastes streamed over fixed-size vertex blocks, for meshes of millions of vertices.
+# Chained generators, one block in flight at a time:
+#   blocks()     vertex indices of each block, as component ranges
+#   read()       main thread, Maya API. adapter.prepare() of the block & the copied values laid out on it.
+#   compute()    NumPy only. adapter.compute() of the block.
+#   write()      main thread, Maya API. adapter.commit() of the block's changed vertices.
+# Working memory is a few arrays of block_size rows whatever the mesh size. Smaller blocks hold less,
+# bigger ones make fewer Maya API calls. Undo keeps every changed vertex, packed (undo.Delta), and so does the
+# revert history unless request.record_history is off.
+
+BLOCK_SIZE = 65536
+# The dialog streams single-target pastes onto meshes above this many vertices, without a revert history entry
+STREAM_ABOVE = 1000000
+
+
+def blocks(count, block_size=BLOCK_SIZE):
+    for start, stop in skin.blocks(count, block_size):
+        yield np.arange(start, stop, dtype=np.int64)
+
+
+def read(accessor, blocks, source):
+    # source(indices): copied values of those target vertices, one row each
+    for indices in blocks:
+        accessor.prepare(indices)
+        yield source(indices)
+
+
+def compute(accessor, sources, request):
+    for values in sources:
+        yield accessor.compute(values, request)
+
+
+def write(accessor, payloads, request):
+    # (vertex indices, values before, values after) of every block that changed
+    for indices, values in payloads:
+        if not len(indices):
+            continue
+        before = accessor.before(indices)
+        accessor.commit((indices, values), request)
+        yield accessor.globalIndices(indices), before, values
+
+
+def source(buffer, mapping=None):
+    # source() for read(): the copy laid out like mapSource() in util.py does, one block at a time.
+    # Mirror: gathered through the target's symmetry map, NaN where unmatched. Past the end of the copy: 0.
+    def values(indices):
+        if mapping is None:
+            return buffer.take(indices)
+        sources = mapping[indices]
+        matched = (sources >= 0) & (sources < len(buffer))
+        result = buffer.take(np.where(matched, sources, 0))
+        result[~matched] = np.nan
+        return result
+    return values
@@ -0,0 +1,99 @@
+from collections import deque
+
+import numpy as np
+
+
+### Vertex symmetry maps. Pure NumPy, no Maya calls.
+# A map is an int array: vertex i mirrors vertex map[i], -1 where no match was found.
+
+AXES = ("x", "y", "z")
+
+
+def spatialMap(points, axis="x", tolerance=1e-3):
+    # Mirror every point across the axis plane & look for the nearest point within tolerance.
+    # Points are hashed into a grid of tolerance sized cells, so only the 27 cells around a mirrored point are searched.
+    points = np.asarray(points, dtype=np.float64)[:, :3]
+    mirrored = points.copy()
+    mirrored[:, AXES.index(axis)] *= -1.0
+
+    cells = np.floor(points / tolerance).astype(np.int64)
+    low = cells.min(axis=0) - 1
+    dims = cells.max(axis=0) - low + 2
+
+    def key(c):
+        return (c[:, 0] * dims[1] + c[:, 1]) * dims[2] + c[:, 2]
+
+    order = np.argsort(key(cells - low), kind="stable")
+    keys = key(cells - low)[order]
+
+    query = np.floor(mirrored / tolerance).astype(np.int64) - low
+    result = np.full(len(points), -1, dtype=np.int64)
+    best = np.full(len(points), tolerance, dtype=np.float64)
+    for offset in np.stack(np.meshgrid([-1, 0, 1], [-1, 0, 1], [-1, 0, 1]), axis=-1).reshape(-1, 3):
+        cell = query + offset
+        inside = ((cell >= 0) & (cell < dims)).all(axis=1)
+        k = key(np.where(inside[:, None], cell, 0))
+        lo = np.searchsorted(keys, k, "left")
+        hi = np.where(inside, np.searchsorted(keys, k, "right"), lo)
+        # Cells hold one point most of the time. Walk the rest one slot at a time.
+        for slot in range(int((hi - lo).max()) if len(lo) else 0):
+            valid = np.flatnonzero(lo + slot < hi)
+            candidates = order[lo[valid] + slot]
+            dist = np.linalg.norm(points[candidates] - mirrored[valid], axis=1)
+            closer = dist <= best[valid]
+            result[valid[closer]] = candidates[closer]
+            best[valid[closer]] = dist[closer]
+    return result
+
+
+def topologicalMap(poly_counts, poly_verts, vCount, seed):
+    # Walk the faces from a seed edge lying on the symmetry line, like Maya's topological symmetry.
+    # Mirroring flips the winding: the face holding half-edge a>b mirrors the face holding b'>a'.
+    poly_counts = np.asarray(poly_counts, dtype=np.int64)
+    poly_verts = np.asarray(poly_verts, dtype=np.int64).tolist()
+    starts = (np.cumsum(poly_counts) - poly_counts).tolist()
+    poly_counts = poly_counts.tolist()
+
+    half_edges = {}
+    for f, (start, count) in enumerate(zip(starts, poly_counts)):
+        face = poly_verts[start:start + count]
+        for i in range(count):
+            half_edges[(face[i], face[(i + 1) % count])] = (f, i)
+
+    result = np.full(vCount, -1, dtype=np.int64)
+    visited = set()
+    a, b = seed
+    queue = deque([((a, b), (a, b))])
+    while queue:
+        (a, b), (ma, mb) = queue.popleft()
+        if (a, b) not in half_edges or (mb, ma) not in half_edges:
+            continue
+        f, i = half_edges[(a, b)]
+        g, j = half_edges[(mb, ma)]
+        if f in visited:
+            continue
+        visited.add(f)
+        count = poly_counts[f]
+        if poly_counts[g] != count:
+            continue
+
+        # f forward from a, g backward from a'
+        face = poly_verts[starts[f]:starts[f] + count]
+        mface = poly_verts[starts[g]:starts[g] + count]
+        verts = [face[(i + k) % count] for k in range(count)]
+        mverts = [mface[(j + 1 - k) % count] for k in range(count)]
+        result[verts] = mverts
+        for k in range(count):
+            x, y = verts[k], verts[(k + 1) % count]
+            mx, my = mverts[k], mverts[(k + 1) % count]
+            queue.append(((y, x), (my, mx)))
+    return result
+
+
+def mirror(values, mapping):
+    # Gather the mirrored weights. Unmatched vertices get NaN, the paste leaves them as they are.
+    values = np.asarray(values, dtype=np.float64)
+    result = np.full((len(mapping),) + values.shape[1:], np.nan)
+    matched = (mapping >= 0) & (mapping < len(values))
+    result[matched] = values[mapping[matched]]
+    return result
@@ -0,0 +1,169 @@
+import numpy as np
+
+
+### Vertex adjacency & neighborhood operators. Pure NumPy, no Maya calls.
+# Adjacency is stored as CSR: the neighbors of vertex i are neighbors[offsets[i]:offsets[i+1]].
+
+OPERATORS = ("smooth", "grow", "shrink", "sharpen")
+
+
+class Adjacency():
+    def __init__(self, offsets, neighbors):
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.neighbors = np.asarray(neighbors, dtype=np.int64)
+        self.degree = np.diff(self.offsets)
+
+    @classmethod
+    def fromFaces(cls, poly_counts, poly_verts, vCount):
+        # Build from MFnMesh.getVertices() output. Edges are consecutive vertices of each face, both directions.
+        poly_counts = np.asarray(poly_counts, dtype=np.int64)
+        poly_verts = np.asarray(poly_verts, dtype=np.int64)
+        if not len(poly_verts):
+            return cls(np.zeros(vCount + 1, dtype=np.int64), [])
+
+        # Next vertex in the same face, wrapping to the face start
+        nxt = np.arange(1, len(poly_verts) + 1)
+        face_ends = np.cumsum(poly_counts)
+        nxt[face_ends - 1] = face_ends - poly_counts
+        a, b = poly_verts, poly_verts[nxt]
+
+        # Both directions, duplicates (shared edges) removed with one sort on a packed key
+        key = np.unique(np.concatenate((a * vCount + b, b * vCount + a)))
+        src, dst = key // vCount, key % vCount
+        offsets = np.zeros(vCount + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(src, minlength=vCount))
+        return cls(offsets, dst)
+
+    def __len__(self):
+        return len(self.degree)
+
+    @property
+    def nbytes(self):
+        return self.offsets.nbytes + self.neighbors.nbytes
+
+    def reduce(self, ufunc, values):
+        # ufunc over each vertex's neighbors. Isolated vertices get their own value.
+        values = np.asarray(values, dtype=np.float64)
+        result = values.copy()
+        # Only rows with neighbors: reduceat can't give an empty segment
+        connected = self.degree > 0
+        if connected.any():
+            result[connected] = ufunc.reduceat(values[self.neighbors], self.offsets[:-1][connected], axis=0)
+        return result
+
+    def sum(self, values):
+        # Sum over each vertex's neighbors. 0 for isolated vertices.
+        sums = self.reduce(np.add, values)
+        sums[self.degree == 0] = 0.0
+        return sums
+
+    def subgraph(self, mask):
+        # Adjacency between the masked vertices only, renumbered in mask order
+        local = np.full(len(self), -1, dtype=np.int64)
+        local[mask] = np.arange(np.count_nonzero(mask))
+        rows = np.repeat(np.arange(len(self)), self.degree)
+        keep = mask[rows] & mask[self.neighbors]
+        offsets = np.zeros(np.count_nonzero(mask) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum(np.bincount(local[rows[keep]], minlength=len(offsets) - 1))
+        return Adjacency(offsets, local[self.neighbors[keep]])
+
+    def mean(self, values):
+        # Isolated vertices average to themselves
+        degree = np.maximum(self.degree, 1).reshape((-1,) + (1,) * (np.ndim(values) - 1))
+        return self.reduce(np.add, values) / degree
+
+
+def smooth(adjacency, values, iterations=1, strength=0.5):
+    # Laplacian smoothing: move every vertex toward the average of its neighbors
+    values = np.array(values, dtype=np.float64)
+    for _ in range(iterations):
+        values += strength * (adjacency.mean(values) - values)
+    return values
+
+
+def grow(adjacency, values, iterations=1):
+    # Dilate: every vertex takes the biggest value around it
+    values = np.array(values, dtype=np.float64)
+    for _ in range(iterations):
+        values = np.maximum(values, adjacency.reduce(np.maximum, values))
+    return values
+
+
+def shrink(adjacency, values, iterations=1):
+    # Erode: every vertex takes the smallest value around it
+    values = np.array(values, dtype=np.float64)
+    for _ in range(iterations):
+        values = np.minimum(values, adjacency.reduce(np.minimum, values))
+    return values
+
+
+def sharpen(adjacency, values, iterations=1, strength=0.5):
+    # Unsharp mask: push every vertex away from the average of its neighbors
+    values = np.array(values, dtype=np.float64)
+    for _ in range(iterations):
+        values += strength * (values - adjacency.mean(values))
+    return values
+
+
+def apply(adjacency, operator, values, iterations=1, strength=0.5):
+    # values: (vertices,) or (vertices, influences)
+    if operator == "smooth":
+        return smooth(adjacency, values, iterations, strength)
+    if operator == "grow":
+        return grow(adjacency, values, iterations)
+    if operator == "shrink":
+        return shrink(adjacency, values, iterations)
+    if operator == "sharpen":
+        return sharpen(adjacency, values, iterations, strength)
+    raise ValueError("Unknown operator: {0}".format(operator))
+
+
+def diffuse(adjacency, values, fixed, iterations=2000, tolerance=1e-5):
+    # Fill the vertices that are not fixed by heat diffusion from the fixed ones (harmonic inpainting).
+    # Solves the graph Laplacian with the fixed values as boundary, by conjugate gradient.
+    # Fixed vertices are never changed. Free vertices with no path to a fixed one keep the CG starting value,
+    # the mean of all the border values.
+    values = np.array(values, dtype=np.float64)
+    free = ~np.asarray(fixed, dtype=bool) & (adjacency.degree > 0)
+    if not free.any():
+        return values
+    flat = values.reshape(len(values), -1)
+
+    # L_ff x = sum of the fixed neighbors' values
+    rows = np.repeat(np.arange(len(adjacency)), adjacency.degree)
+    border = free[rows] & ~free[adjacency.neighbors]
+    local = np.cumsum(free) - 1
+    b = np.zeros((np.count_nonzero(free), flat.shape[1]))
+    for c in range(flat.shape[1]):
+        b[:, c] = np.bincount(local[rows[border]], weights=flat[adjacency.neighbors[border], c], minlength=len(b))
+
+    inner = adjacency.subgraph(free)
+    degree = adjacency.degree[free][:, None].astype(np.float64)
+
+    def laplacian(x):
+        return degree * x - inner.sum(x)
+
+    # Jacobi preconditioned CG, all columns at once. Start from the mean of the border values.
+    x = np.zeros_like(b)
+    x[:] = b.sum(axis=0) / max(np.count_nonzero(border), 1)
+    r = b - laplacian(x)
+    z = r / degree
+    p = z.copy()
+    rz = (r * z).sum(axis=0)
+    stop = tolerance * np.maximum(np.linalg.norm(b, axis=0), 1e-12)
+    for _ in range(iterations):
+        if (np.linalg.norm(r, axis=0) <= stop).all():
+            break
+        lp = laplacian(p)
+        plp = (p * lp).sum(axis=0)
+        alpha = np.divide(rz, plp, out=np.zeros_like(rz), where=plp > 0)
+        x += alpha * p
+        r -= alpha * lp
+        z = r / degree
+        rz_new = (r * z).sum(axis=0)
+        beta = np.divide(rz_new, rz, out=np.zeros_like(rz), where=rz > 0)
+        p = z + beta * p
+        rz = rz_new
+
+    flat[free] = x
+    return flat.reshape(values.shape)
@@ -0,0 +1,151 @@
+### Undo support for bulk API writes.
+# MFnSkinCluster.setWeights & friends are not undoable. This file is also a tiny Maya plugin: its command
+# takes an (undo, redo) pair pushed by record(), so a whole bulk write becomes one entry in Maya's undo queue.
+#
+# Weight records are deltas: only the changed vertices, with their old & new values, packed into one bytes
+# object (zlib compressed when big). The undo queue costs memory in proportion to the changed vertices only.
+import os
+import zlib
+
+import numpy as np
+
+import maya.api.OpenMaya as om
+import maya.cmds as cmds
+
+
+COMMAND_NAME = "kaiaWeightUndo"
+# Records bigger than this are compressed. Level 1: fast, & weights (runs of 0 & 1) compress well.
+COMPRESS_ABOVE = 1 << 20
+COMPRESS_LEVEL = 1
+# Warn before a write when the records kept by Maya's undo queue would grow past this many bytes. 0 = no cap.
+MEMORY_CAP = 512 << 20
+
+# (undo, redo, nbytes) waiting to be picked up by the command.
+# Maya loads this file as a plugin under another module name, so the command always reads the package module.
+_pending = []
+# Bytes held by the records still in Maya's undo queue
+_usage = [0]
+
+
+def maya_useNewAPI():
+    pass
+
+
+def pluginPath():
+    path = os.path.abspath(__file__)
+    if path.endswith(".pyc"):
+        path = path[:-1]
+    return path
+
+
+def ensureLoaded():
+    path = pluginPath()
+    if not cmds.pluginInfo(path, q=True, loaded=True):
+        cmds.loadPlugin(path, quiet=True)
+
+
+def record(undo, redo, nbytes=0):
+    # Push one undoable step. The write itself must already be done.
+    ensureLoaded()
+    _pending.append((undo, redo, nbytes))
+    getattr(cmds, COMMAND_NAME)()
+
+
+class Delta():
+    # indices (vertices,) & old/new values (vertices,) or (vertices, columns), packed.
+    # Indices are stored as the steps between them (int32), small numbers that compress well.
+    def __init__(self, indices, old, new, compress=None):
+        indices = np.asarray(indices, dtype=np.int64)
+        old = np.ascontiguousarray(old, dtype=np.float64)
+        new = np.ascontiguousarray(new, dtype=np.float64)
+        self.count = len(indices)
+        self.shape = old.shape
+        data = np.diff(indices, prepend=0).astype(np.int32).tobytes() + old.tobytes() + new.tobytes()
+        self.compressed = len(data) > COMPRESS_ABOVE if compress is None else compress
+        self.data = zlib.compress(data, COMPRESS_LEVEL) if self.compressed else data
+
+    @property
+    def nbytes(self):
+        return len(self.data)
+
+    def unpack(self):
+        # > indices, old, new
+        data = zlib.decompress(self.data) if self.compressed else self.data
+        split = self.count * 4
+        size = int(np.prod(self.shape)) * 8
+        indices = np.cumsum(np.frombuffer(data[:split], dtype=np.int32), dtype=np.int64)
+        old = np.frombuffer(data[split:split + size], dtype=np.float64).reshape(self.shape)
+        new = np.frombuffer(data[split + size:], dtype=np.float64).reshape(self.shape)
+        return indices, old, new
+
+
+def recordDelta(write, indices, old, new):
+    # Undo step for a bulk write already done: write(indices, values) puts old back on undo, new on redo
+    delta = Delta(indices, old, new)
+
+    def undo():
+        indices, old, new = delta.unpack()
+        write(indices, old)
+
+    def redo():
+        indices, old, new = delta.unpack()
+        write(indices, new)
+
+    record(undo, redo, delta.nbytes)
+    return delta
+
+
+def estimate(values):
+    # Uncompressed record size for a write of these values
+    values = np.asarray(values)
+    return len(values) * 4 + 2 * values.size * 8
+
+
+def checkMemory(nbytes):
+    # Warn before a write whose record would push the undo queue past MEMORY_CAP. False when it would.
+    if not MEMORY_CAP or _usage[0] + nbytes <= MEMORY_CAP:
+        return True
+    om.MGlobal.displayWarning("Weight undo would hold {0:.0f} MB, over the {1:.0f} MB cap. "
+                              "Flush the undo queue or paste with Undoable off.".format(
+                                  (_usage[0] + nbytes) / float(1 << 20), MEMORY_CAP / float(1 << 20)))
+    return False
+
+
+def usage():
+    # Bytes held by the weight records in Maya's undo queue
+    return _usage[0]
+
+
+class UndoCommand(om.MPxCommand):
+    def __init__(self):
+        super().__init__()
+        self.undo = None
+        self.redo = None
+        self.nbytes = 0
+
+    def __del__(self):
+        # Dropped from the undo queue (flushed or past the queue length)
+        from Kaia_WeightTransfer import undo as shared
+        shared._usage[0] -= self.nbytes
+
+    def doIt(self, args):
+        from Kaia_WeightTransfer import undo as shared
+        self.undo, self.redo, self.nbytes = shared._pending.pop()
+        shared._usage[0] += self.nbytes
+
+    def undoIt(self):
+        self.undo()
+
+    def redoIt(self):
+        self.redo()
+
+    def isUndoable(self):
+        return True
+
+
+def initializePlugin(plugin):
+    om.MFnPlugin(plugin, "Kaia Kim", "1.0").registerCommand(COMMAND_NAME, UndoCommand)
+
+
+def uninitializePlugin(plugin):
+    om.MFnPlugin(plugin).deregisterCommand(COMMAND_NAME)
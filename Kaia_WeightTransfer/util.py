@@ -1,294 +1,515 @@
-import maya.api.OpenMaya as om
-import maya.api.OpenMayaAnim as oma
-import maya.cmds as cmds
-import maya.mel as mel
-
-
-### tool that transfer current influence weight to another (skinCluster or Deformer) influence
-class WeightTransferCompute():
-    def __init__(self):
-        pass
-    
-    def initialCheck(self, sel, qCheck=False, eCheck=False):
-        # We're doing the operation on one mesh.
-        if sel.length() != 1:
-            om.MGlobal.displayError("There must be only one selection.")
-            return
-            
-        # We're doing the operation on poligon shape node.
-        try:
-            current_shape = sel.getDagPath(0).extendToShape() # dag
-        except:
-            om.MGlobal.displayError("Selection must have a shape node directly parented under.")
-            return
-        
-        # Only poligon mesh! No Nurbs surface.
-        if current_shape.apiType() != 296: 
-            om.MGlobal.displayError("Selection must be a poligon mesh.")
-            return
-        
-        # When pasting the weight, is the source mesh same to the current mesh?
-        if self.source_shape and eCheck:   # if source shape is not None
-            if self.source_shape != current_shape:
-                om.MGlobal.displayWarning("The source mesh is not same to the target mesh. Users might get unexpected results.")
-        
-        # What tool are we using?
-        tool_ctx = cmds.currentCtx() # context is the instance of the tool class
-        current_tool = cmds.contextInfo(tool_ctx, q=True, c=True) # c is class type
-        
-        tool_ls = ["artAttrSkin","artAttrBlendShape", "artAttrNCloth", "artAttr"]
-        if current_tool not in tool_ls:
-            om.MGlobal.displayError("Current tool must be either Paint Skin Weights Tool, Paint Blend Shape Weights Tool, Paint nCloth Attributes Tool, or Paint Attributes Tool.")
-            return
-        
-        # What node & attribute are we painting?
-        # example: 'deltaMush.deltaMush1.weights'
-        attr_ctx = cmds.artAttrCtx(tool_ctx, q=True, asl=True)
-        if attr_ctx == '':
-            om.MGlobal.displayError("User must select an attribute to paint.")
-            return
-            
-        current_type, current_node, current_paint = attr_ctx.split(".")
-        
-        # If the user painting skin weights, we must know the specific joint name. Overriding current_paint.
-        # User might select multiple joints. 
-        if current_tool == "artAttrSkin": #Paint Skin Weights Tool
-            current_paint = mel.eval('string $selectedInfs[] = `treeView -q -si $gArtSkinInfluencesList`') # list
-            if current_paint == []:
-                om.MGlobal.displayError("An influence must be selected inside Paint Skin Weights Tool.")
-                return
-        
-        return current_tool, current_shape, current_type, current_node, current_paint
-        
-
-    def querySkinWeights(self, shape_dag, skinclst, infs):
-        # Get objects & function sets...
-        skinclst_obj = om.MSelectionList().add(skinclst).getDependNode(0) # Mobject
-        skinclst_fn = oma.MFnSkinCluster(skinclst_obj)
-        
-         # Create an empty array...
-        weights = om.MDoubleArray()
-        
-        # Iterate over every vertices...
-        itVerts = om.MItMeshVertex(shape_dag)
-        while not itVerts.isDone():
-            vert_obj = itVerts.currentItem() # MObject
-            
-            ###QUERY WEIGHTS
-            weight = 0.0
-            for inf in infs:
-                # Get an index for each influence...
-                inf_dag = om.MSelectionList().add(inf).getDagPath(0)
-                inf_idx = skinclst_fn.indexForInfluenceObject(inf_dag) # int
-                
-                x = skinclst_fn.getWeights(shape_dag, vert_obj, inf_idx)[0] # float
-                weight += x
-                
-            weights.append(weight)
-            
-            itVerts.next()
-
-        # Store queried data...
-        self.source_weights = weights
-        self.source_shape = shape_dag
-        
-        om.MGlobal.displayInfo("Copy skin weights success!")
-        
-        
-    def queryBlendWeights(self, shape_dag, blendShape, paint):
-        # There is no dedicated function set for accessing blendshape deformer weights (not blendshape weights!)
-        # Therefore we"re accessing those values using Mplug object.
-        
-        # Get blendshape node function set...
-        blendShape_obj = om.MSelectionList().add(blendShape).getDependNode(0) # Mobject
-        blendShape_fn = om.MFnDependencyNode(blendShape_obj)
-        
-        # Get the weight plug...
-        inputTarget_plug = blendShape_fn.findPlug("inputTarget", True).elementByPhysicalIndex(0)
-        # result: blendshape.inputTarget[0]
-        if paint == 'baseWeights':
-            paint_plug = inputTarget_plug.child(1)
-            # result: blendshape.inputTarget[0].baseWeights
-        elif paint == 'paintTargetWeights':
-            paint_plug = inputTarget_plug.child(3)
-            # result: blendshape.inputTarget[0].paintTargetWeights
-        
-        # Create an empty array...
-        weights = om.MDoubleArray()
-        
-        # Iterate over every vertices...
-        itVerts = om.MItMeshVertex(shape_dag)
-        while not itVerts.isDone():
-            i = itVerts.index()
-            child_plug = paint_plug.elementByLogicalIndex(i) # MPlug
-            
-            ###QUERY WEIGHTS
-            weight = child_plug.asFloat() # float
-            weights.append(weight)
-            
-            itVerts.next()
-        
-        # update display (color feedback)...
-        mel.eval("artAttrBlendShapeValues artAttrBlendShapeContext;")
-        
-        # Store queried data...
-        self.source_shape = shape_dag
-        self.source_weights = weights
-
-        om.MGlobal.displayInfo("Copy blendshape weights success!")
-        
-        
-    def queryNClothWeights(self):
-        pass
-    
-        
-    def queryDeformerWeights(self):
-        deformer = "cluster1"
-        deformer_obj = om.MSelectionList().add(deformer).getDependNode(0) # Mobject
-        weightGeoFilter_fn = oma.MFnWeightGeometryFilter(deformer_obj)
-
-        print("deformer:", deformer)
-        print("deformer_obj:", deformer_obj, type(deformer_obj))
-        print("weightGeoFilter_fn:", weightGeoFilter_fn, type(weightGeoFilter_fn))
-
-        envelope_weights = weightGeoFilter_fn.name()
-        print("envelope_weights:", envelope_weights, type(envelope_weights))
-    
-    
-    def editSkinWeights(self, shape_dag, skinclst, infs):
-        # Get names & objects & function sets...
-        shape_name = shape_dag.fullPathName() # str
-        skinclst_obj = om.MSelectionList().add(skinclst).getDependNode(0) # Mobject
-        skinclst_fn = oma.MFnSkinCluster(skinclst_obj)
-        
-        # if there's one inf selection get the first(and only) element
-        # if there's multiple inf selection, we have to query last selected influence...
-        if len(infs) == 1:
-            inf = infs[0]
-        elif len(infs) > 1:
-            inf = mel.eval('string	$influence = $artSkinLastSelectedInfluence;')
-            # Same to cmds.artAttrSkinPaintCtx(cmds.currentCtx(), q=True, inf=True) but faster
- 
-        # Get index for the influence...
-        inf_dag = om.MSelectionList().add(inf).getDagPath(0) # dag
-        inf_idx = skinclst_fn.indexForInfluenceObject(inf_dag) # int
-        
-        # Check for lock/unlock state for the influences...
-        allInf_array = skinclst_fn.influenceObjects() # MDagPathArray
-        unlock_count = 0
-        for num, i in enumerate(allInf_array):
-            if i == inf_dag:
-                continue # skip the target influence. Doesn"t matter.
-            locked = cmds.getAttr(skinclst+".lockWeights[{0}]".format(num))
-            if not locked:
-                unlock_count += 1
-        
-        # Display Warning if the unlock count is not 1 (except target inf)...
-        if unlock_count == 0:
-            om.MGlobal.displayWarning("None of influences is unlocked. Weights can't be normalized due to locked influences.")
-        elif unlock_count > 1:
-            om.MGlobal.displayWarning("Multiple influences are unlocked. Weights might leak into unwanted influences.")
-        
-        cmds.scriptEditorInfo(suppressWarnings = True)
-
-        # Iterate over every vertices...
-        itVerts = om.MItMeshVertex(shape_dag)
-        while not itVerts.isDone():
-            i = itVerts.index()
-            vert_obj = itVerts.currentItem() #MObject
-            try:
-                weight = self.source_weights[i] # float
-            except:
-                weight = 0.0 # if source verts < target verts: index out of range. Set default value to 0.
-            
-            # Calculate add, scale, replace operation...
-            old_weight = skinclst_fn.getWeights(shape_dag, vert_obj, inf_idx)[0] # MDoublearray > float
-            if self.add_rb.isChecked():
-                weight += old_weight
-            elif self.scale_rb.isChecked():
-                weight *= old_weight
-                
-            if weight > 1:
-                weight = 1.0
-            
-            ###EDIT WEIGHTS
-            # Those two method does the same thing. API is faster, but is not undoable.
-            if self.undoable:
-                vert = "{0}.vtx[{1}]".format(shape_name, i)
-                cmds.skinPercent(skinclst, vert, tv=(inf, weight), normalize=True)
-
-            elif not self.undoable:
-                skinclst_fn.setWeights(shape_dag, vert_obj, inf_idx, weight, normalize=True)
-
-            itVerts.next()
-            
-        cmds.scriptEditorInfo(suppressWarnings = False)
-        om.MGlobal.displayInfo("Paste skin weight success!")
-        
-        
-    def editBlendWeights(self, shape_dag, blendShape, paint):
-        # Get blendshape node function set...
-        blendShape_obj = om.MSelectionList().add(blendShape).getDependNode(0) # Mobject
-        blendShape_fn = om.MFnDependencyNode(blendShape_obj)
-        
-        # Get the weight plug...
-        inputTarget_plug = blendShape_fn.findPlug("inputTarget", True).elementByPhysicalIndex(0)
-        # result: blendshape.inputTarget[0]
-        if paint == 'baseWeights':
-            paint_plug = inputTarget_plug.child(1)
-            # result: blendshape.inputTarget[0].baseWeights
-        elif paint == 'paintTargetWeights':
-            paint_plug = inputTarget_plug.child(3)
-            # result: blendshape.inputTarget[0].paintTargetWeights
-        
-        # Iterate over every vertices...
-        itVerts = om.MItMeshVertex(shape_dag)
-        while not itVerts.isDone():
-            i = itVerts.index()
-            child_plug = paint_plug.elementByLogicalIndex(i) # MPlug
-            # result: blendShape.inputTarget[0].baseWeights[99]
-            
-            if child_plug.isLocked:
-                om.MGlobal.displayError("{0} plug is locked. Aborting set weights function.".format(child_plug)) 
-                return # might cause error when the loop is in process
-            elif child_plug.isConnected:
-                om.MGlobal.displayError("{0} plug is connected. Aborting set weights function.".format(child_plug))
-                return
-
-            try:
-                weight = self.source_weights[i] # float
-            except:
-                weight = 0.0 # if source verts < target verts: index out of range... Set default value to 0.
-            
-            # Calculate add, scale, replace operation...
-            old_weight = child_plug.asFloat()
-            if self.add_rb.isChecked():
-                weight += old_weight
-            elif self.scale_rb.isChecked():
-                weight *= old_weight
-            
-            ###EDIT WEIGHTS
-            if self.undoable:
-                attr = child_plug.name()
-                cmds.setAttr(attr, weight)
-            elif not self.undoable:
-                child_plug.setFloat(weight)
-            
-            itVerts.next()
-        
-        # update display (color feedback)...
-        mel.eval("artAttrBlendShapeValues artAttrBlendShapeContext;")
-        
-        om.MGlobal.displayInfo("Paste blendshape weights success!")
-    
-        
-    def editNClothWeights(self):
-        pass
-    
-        
-    def editDeformerWeights(self):
-        pass
-    
-            
-        
-
+import maya.api.OpenMaya as om
+import maya.cmds as cmds
+
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+
+from Kaia_WeightTransfer import access
+from Kaia_WeightTransfer import blend
+from Kaia_WeightTransfer import compare
+from Kaia_WeightTransfer import expression
+from Kaia_WeightTransfer import history
+from Kaia_WeightTransfer import mesh
+from Kaia_WeightTransfer import skin
+from Kaia_WeightTransfer import storage
+from Kaia_WeightTransfer import stream
+from Kaia_WeightTransfer import symmetry
+from Kaia_WeightTransfer import topology
+from Kaia_WeightTransfer import undo
+
+
+### tool that transfer current influence weight to another (skinCluster or Deformer) influence
+class WeightTransferCompute():
+    def __init__(self):
+        self.version = int( cmds.about(version=True) )
+        self.source_shape = None
+        self.source_weights = None
+        self.history = history.History()
+        self.report = None
+    
+    def copy(self, request):
+        # Read request.source into self.source_weights, one bulk read through its adapter
+        read, compute, write = self.copyStages(request)
+        try:
+            result = compute(read())
+        except (RuntimeError, ValueError) as e:
+            om.MGlobal.displayError(str(e))
+            return None
+        return write(result)
+    
+    def copyStages(self, request):
+        # read: main thread, Maya. compute: any thread, quantizes the copy. write: main thread, keeps it.
+        source = request.source
+        metadata = {"node_type": source.node_type}
+        
+        def read():
+            if source.node_type == access.STACK or (request.matrix and source.node_type in access.MATRIX_ADAPTERS):
+                # One column per influence, blendShape map or deformer of the stack
+                accessor = access.matrixAccessFor(source, self.version)
+                return accessor, accessor.read(), accessor.names
+            accessor = access.accessFor(source, self.version)
+            return accessor, accessor.read(), None
+        
+        def compute(data):
+            accessor, values, names = data
+            if names is not None:
+                return accessor, storage.InfluenceBuffer(values, names, request.precision, metadata)
+            return accessor, storage.WeightBuffer(values, request.precision, metadata)
+        
+        def write(result):
+            accessor, self.source_weights = result
+            self.source_shape = source.shape
+            # update display (color feedback)...
+            if request.feedback:
+                accessor.refresh()
+            om.MGlobal.displayInfo("Copy {0} weights success!".format(source.node_type))
+            return self.source_weights
+        
+        return read, compute, write
+    
+    def accessFor(self, request, buffer=None):
+        # Adapter for request.target, matching the copied buffer
+        buffer = self.source_weights if buffer is None else buffer
+        if isinstance(buffer, storage.InfluenceBuffer):
+            node_type = buffer.metadata.get("node_type", "skinCluster")
+            if request.target.node_type != node_type:
+                raise ValueError("Maps copied from a {0} can only be pasted on a {0}.".format(node_type))
+            return access.matrixAccessFor(request.target, self.version, buffer.influences, request.influence_map)
+        return access.accessFor(request.target, self.version)
+    
+    def paste(self, request):
+        # Paste self.source_weights onto request.target: bulk read, vectorized compute, bulk write of the changed vertices
+        read, compute, write = self.pasteStages(request)
+        try:
+            result = compute(read())
+        except (RuntimeError, ValueError) as e:
+            om.MGlobal.displayError(str(e))
+            return None
+        return write(result)
+    
+    def pasteStages(self, request):
+        # read: main thread, Maya. compute: any thread, maps, blends & normalizes. write: main thread, changed vertices only.
+        # The copied buffer is taken now: a copy made before the write doesn't change this paste.
+        buffer = self.source_weights
+        shape_dag = request.target.shape
+        
+        def read():
+            accessor = self.accessFor(request, buffer)
+            self.warnFingerprint(buffer, shape_dag)
+            accessor.prepare()
+            if type(accessor) is access.SkinAccess and request.normalize:
+                self.checkLocks(accessor)
+            return accessor, self.mappingData(request, shape_dag, len(buffer), accessor.vCount)
+        
+        def compute(data):
+            accessor, (mapping, adjacency) = data
+            source = mapSource(buffer.toArray(), request, accessor.vCount, mapping, adjacency)
+            return accessor, unmatched(source, mapping), accessor.compute(source, request)
+        
+        def write(result):
+            accessor, missing, (indices, values) = result
+            self.warnUnmatched(request, shape_dag, missing)
+            if len(indices):
+                before = accessor.before(indices)
+                accessor.commit((indices, values), request)
+                if request.record_history:
+                    snapshot = history.Snapshot("Paste onto {0}".format(shape_dag.partialPathName()))
+                    snapshot.add(accessor, indices, before, values)
+                    self.history.push(snapshot)
+            
+            # update display (color feedback)...
+            if request.feedback:
+                accessor.refresh(indices)
+            
+            om.MGlobal.displayInfo("Paste {0} weights success! ({1} vertices changed)".format(request.target.node_type, len(indices)))
+            return len(indices)
+        
+        return read, compute, write
+    
+    def pasteStream(self, request, block_size=stream.BLOCK_SIZE):
+        # paste() one vertex block at a time: read, compute & write a block before the next one is read.
+        # Working memory is bounded by block_size instead of the mesh size, see stream.py. One undo step.
+        # The revert history still grows with the changed vertices: see request.record_history.
+        try:
+            return self.pasteBlocks(request, block_size)
+        except (RuntimeError, ValueError) as e:
+            om.MGlobal.displayError(str(e))
+            return None
+    
+    def pasteBlocks(self, request, block_size=stream.BLOCK_SIZE):
+        # pasteStream() without the error display: raises. Returns the number of changed vertices.
+        # Diffusion solves over the whole mesh & doubleArray maps are written whole: those paste in one go.
+        buffer = self.source_weights
+        shape_dag = request.target.shape
+        accessor = self.accessFor(request, buffer)
+        if not accessor.STREAMS or (not request.mirror and request.fill == "diffuse" and len(buffer) < accessor.vCount):
+            read, compute, write = self.pasteStages(request)
+            return write(compute(read()))
+        self.warnFingerprint(buffer, shape_dag)
+        mapping, adjacency = self.mappingData(request, shape_dag, len(buffer), accessor.vCount)
+        if type(accessor) is access.SkinAccess and request.normalize:
+            accessor.readLocks()
+            self.checkLocks(accessor)
+        if mapping is not None:
+            self.warnUnmatched(request, shape_dag, int(((mapping < 0) | (mapping >= len(buffer))).sum()))
+        
+        blocks = stream.read(accessor, stream.blocks(accessor.vCount, block_size), stream.source(buffer, mapping))
+        changed = 0
+        snapshot = history.Snapshot("Paste onto {0}".format(shape_dag.partialPathName())) if request.record_history else None
+        if request.undoable:
+            cmds.undoInfo(openChunk=True)
+        try:
+            for indices, before, after in stream.write(accessor, stream.compute(accessor, blocks, request), request):
+                if snapshot is not None:
+                    snapshot.add(accessor, indices, before, after)
+                changed += len(indices)
+                if request.feedback:
+                    accessor.refresh(indices)
+        except (RuntimeError, ValueError) as e:
+            # The blocks written so far stay, revertable if recorded
+            raise type(e)("Paste stopped after {0} vertices: {1}".format(changed, e))
+        finally:
+            if request.undoable:
+                cmds.undoInfo(closeChunk=True)
+            accessor.release()
+            if snapshot is not None:
+                self.history.push(snapshot)
+        
+        om.MGlobal.displayInfo("Paste {0} weights success! ({1} vertices changed, {2} vertex blocks)".format(
+            request.target.node_type, changed, -(-accessor.vCount // block_size)))
+        return changed
+    
+    def copyAsync(self, request, pipeline, done=None):
+        # copy() through a pipeline.Pipeline: quantization off the main thread.
+        # done(buffer) after the write, done(None) if the copy failed.
+        read, compute, write = self.copyStages(request)
+        pipeline.submit("clipboard", read, compute, lambda result: self.finished(done, write(result)),
+                        lambda error: self.finished(done, None))
+    
+    def pasteAsync(self, request, pipeline, done=None):
+        # paste() through a pipeline.Pipeline. One undo step per paste, made when the write runs.
+        # Pastes onto the same mesh queue up, pastes onto other meshes overlap. Keyed on the mesh, not the map:
+        # a skin paste writes whole rows, a matrix or stack paste many maps, so two maps of one mesh can't overlap.
+        # done(changed vertices) after the write, done(None) if the paste failed.
+        read, compute, write = self.pasteStages(request)
+        target = request.target
+        
+        def undoableWrite(result):
+            cmds.undoInfo(openChunk=True)
+            try:
+                changed = write(result)
+            finally:
+                cmds.undoInfo(closeChunk=True)
+            self.finished(done, changed)
+        
+        pipeline.submit(target.shape.fullPathName(), read, compute, undoableWrite,
+                        lambda error: self.finished(done, None))
+    
+    def filterAsync(self, operator, iterations, strength, pipeline, done=None):
+        # filterWeights() through a pipeline.Pipeline: the smoothing runs off the main thread
+        stages = self.filterStages(operator, iterations, strength)
+        if stages:
+            read, compute, write = stages
+            pipeline.submit("clipboard", read, compute, lambda result: self.finished(done, write(result)),
+                            lambda error: self.finished(done, None))
+    
+    def finished(self, done, result):
+        if done is not None:
+            done(result)
+        return result
+        
+    def checkLocks(self, accessor):
+        # Check for lock/unlock state for the influences other than the target one...
+        others = np.ones(len(accessor.locks), dtype=bool)
+        others[accessor.column] = False
+        unlock_count = int((others & ~accessor.locks).sum())
+        
+        # Display Warning if the unlock count is not 1 (except target inf)...
+        if unlock_count == 0:
+            om.MGlobal.displayWarning("None of influences is unlocked. Weights can't be normalized due to locked influences.")
+        elif unlock_count > 1:
+            om.MGlobal.displayWarning("Multiple influences are unlocked. Weights might leak into unwanted influences.")
+        
+
+    def pasteMany(self, requests, workers=None):
+        # Paste self.source_weights onto many targets in one pass.
+        # Maya reads & writes run here on the main thread, serialized.
+        # Mapping, blending & normalization run in a thread pool (NumPy releases the GIL).
+        start = time.time()
+        
+        # Validate & resolve every target before touching anything...
+        accessors = []
+        for request in requests:
+            try:
+                accessors.append(self.accessFor(request))
+                self.warnFingerprint(self.source_weights, request.target.shape)
+            except (RuntimeError, ValueError) as e:
+                om.MGlobal.displayError("{0}: {1}".format(request.target.shape.partialPathName(), e))
+                return None
+        
+        # Dequantize once, map once per target vertex count...
+        source = self.source_weights.toArray()
+        mapped = {} # {key: future of (mapped source, unmatched vertices)}
+        
+        def mapTask(request, vCount, mapping, adjacency):
+            values = mapSource(source, request, vCount, mapping, adjacency)
+            return values, unmatched(values, mapping)
+        
+        def computeTask(accessor, request, mapping):
+            # The mapping was submitted first, so it's already running or done: no deadlock on a full pool
+            values, missing = mapping.result()
+            return missing, accessor.compute(values, request)
+        
+        vert_total = 0
+        write_total = 0
+        snapshot = history.Snapshot("Paste onto {0} targets".format(len(requests)))
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = []
+                for accessor, request in zip(accessors, requests):
+                    # Zero fill depends on the vertex count only, diffusion & mirror on the mesh too
+                    key = accessor.vCount
+                    if request.mirror or (request.fill == "diffuse" and len(source) < accessor.vCount):
+                        key = accessor.target.shape.fullPathName()
+                    if key not in mapped:
+                        # Mesh data read here, the diffusion or mirror gather runs in the pool
+                        mapping, adjacency = self.mappingData(request, accessor.target.shape, len(source), accessor.vCount)
+                        mapped[key] = pool.submit(mapTask, request, accessor.vCount, mapping, adjacency)
+                    accessor.prepare()
+                    if type(accessor) is access.SkinAccess and request.normalize:
+                        self.checkLocks(accessor)
+                    futures.append(pool.submit(computeTask, accessor, request, mapped[key]))
+                    vert_total += accessor.vCount
+                
+                # Writes in request order, while the later targets are still computing
+                for accessor, request, future in zip(accessors, requests, futures):
+                    missing, payload = future.result()
+                    self.warnUnmatched(request, accessor.target.shape, missing)
+                    if len(payload[0]):
+                        before = accessor.before(payload[0])
+                        accessor.commit(payload, request)
+                        snapshot.add(accessor, payload[0], before, payload[1])
+                        write_total += len(payload[0])
+                        # Merged into one refresh per feedback command
+                        if request.feedback:
+                            accessor.refresh(payload[0])
+        except (RuntimeError, ValueError) as e:
+            # The targets written so far stay, revertable
+            om.MGlobal.displayError("{0}: {1}".format(accessor.target.shape.partialPathName(), e))
+            return None
+        finally:
+            self.history.push(snapshot)
+        
+        elapsed = time.time() - start
+        stats = {"targets": len(requests), "vertices": vert_total, "written": write_total, "time": elapsed}
+        om.MGlobal.displayInfo("Paste success! {0} targets, {1} vertices ({2} changed), {3:.0f} verts/s".format(
+            len(requests), vert_total, write_total, vert_total / max(elapsed, 1e-6)))
+        return stats
+    
+
+    def compareWeights(self, request, tolerance=None, heatmap=False, bins=10):
+        # Live weights of request.target against the copy, laid out on it like a replace paste writes it.
+        # tolerance: default compare.TOLERANCE plus the copy's quantization error.
+        # heatmap: error colors in a temporary color set on the target. Kept in self.report & returned.
+        if not self.source_weights:
+            om.MGlobal.displayError("Copy weights first.")
+            return None
+        shape_dag = request.target.shape
+        try:
+            accessor = self.accessFor(request)
+            actual = accessor.read()
+        except (RuntimeError, ValueError) as e:
+            om.MGlobal.displayError(str(e))
+            return None
+        
+        expected = self.mappedSource(self.source_weights.toArray(), request, shape_dag, accessor.vCount)
+        if request.clamp:
+            expected = np.clip(expected, 0.0, 1.0) # NaN stays NaN
+        if tolerance is None:
+            tolerance = compare.TOLERANCE + storage.errorBound(self.source_weights.precision)
+        self.report = compare.Report(expected, actual, tolerance, bins)
+        
+        if heatmap:
+            levels = compare.heatmapLevels(self.report.errors, max(self.report.max_error, tolerance), tolerance)
+            mesh.writeColorSet(shape_dag, compare.HEATMAP_COLOR_SET, compare.heatmapPalette(), levels)
+        
+        message = "{0}: {1}".format(shape_dag.partialPathName(), self.report)
+        if self.report.passed:
+            om.MGlobal.displayInfo(message)
+        else:
+            om.MGlobal.displayWarning(message)
+        return self.report
+    
+    def clearHeatmap(self, shape_dag):
+        mesh.deleteColorSet(shape_dag, compare.HEATMAP_COLOR_SET)
+    
+    def revert(self, undoable=False, feedback=True):
+        # Put back what the latest paste replaced, one bulk write per target. Maya's undo queue is not walked.
+        try:
+            snapshot = self.history.revert(undoable, feedback)
+        except RuntimeError as e:
+            om.MGlobal.displayError("Revert failed, the pasted nodes changed: {0}".format(e))
+            return None
+        if snapshot is None:
+            om.MGlobal.displayWarning("Nothing to revert.")
+        else:
+            om.MGlobal.displayInfo("Reverted: {0}".format(snapshot.label))
+        return snapshot
+    
+    def reapply(self, undoable=False, feedback=True):
+        # Paste the latest reverted snapshot again, without recomputing it
+        try:
+            snapshot = self.history.reapply(undoable, feedback)
+        except RuntimeError as e:
+            om.MGlobal.displayError("Re-apply failed, the pasted nodes changed: {0}".format(e))
+            return None
+        if snapshot is None:
+            om.MGlobal.displayWarning("Nothing to re-apply.")
+        else:
+            om.MGlobal.displayInfo("Re-applied: {0}".format(snapshot.label))
+        return snapshot
+        
+        
+    def moveSkinWeights(self, request, ratio=1.0, indices=None):
+        # Move weight from the source influences to the target influence of the same skinCluster.
+        # Only those columns are read & written, the other influences are untouched. One undo step.
+        shape_dag, skinclst = request.target.shape, request.target.node
+        skinclst_fn = skin.getSkinFn(skinclst)
+        
+        # Get influence columns...
+        inf_map = skin.influenceMap(skinclst_fn)
+        names = [inf for inf in request.source.paint if inf != request.target.paint[0]] + [request.target.paint[0]]
+        columns = [inf_map.get(inf, inf_map.get(skin.shortName(inf))) for inf in names]
+        if None in columns or len(columns) < 2:
+            om.MGlobal.displayError("Select a source and a different target influence of {0}.".format(skinclst))
+            return
+        locks = skin.getLocks(skinclst_fn)
+        locked = [name for name, column in zip(names, columns) if locks[column]]
+        if locked:
+            om.MGlobal.displayError("Locked influences can't be changed: {0}".format(", ".join(locked)))
+            return
+        
+        # Whole mesh, or only the given vertices...
+        if indices is None:
+            indices = range(om.MFnMesh(shape_dag).numVertices)
+        indices = np.asarray(indices, dtype=np.int64)
+        
+        ###MOVE WEIGHTS
+        old_block = skin.readWeights(skinclst_fn, shape_dag, indices, columns)
+        new_block = skin.moveWeights(old_block, ratio)
+        changed = np.flatnonzero((new_block != old_block).any(axis=1))
+        if not len(changed):
+            om.MGlobal.displayInfo("Nothing to move.")
+            return
+        
+        indices, old_block, new_block = indices[changed], old_block[changed], new_block[changed]
+        if request.undoable:
+            undo.checkMemory(undo.estimate(new_block))
+        skin.writeWeights(skinclst_fn, shape_dag, indices, columns, new_block)
+        if request.undoable:
+            undo.recordDelta(lambda i, block: skin.writeWeights(skinclst_fn, shape_dag, i, columns, block),
+                             indices, old_block, new_block)
+        
+        om.MGlobal.displayInfo("Move skin weights success! {0} > {1}, {2} vertices".format(", ".join(names[:-1]), names[-1], len(indices)))
+        
+        
+    def filterWeights(self, operator, iterations=1, strength=0.5):
+        # Smooth, grow, shrink or sharpen the copied weights over the source mesh, before pasting.
+        # The adjacency is built once per topology & cached.
+        stages = self.filterStages(operator, iterations, strength)
+        if stages:
+            read, compute, write = stages
+            write(compute(read()))
+        
+    def filterStages(self, operator, iterations=1, strength=0.5):
+        if not self.source_weights or self.source_shape is None:
+            om.MGlobal.displayError("Copy weights from a mesh first.")
+            return None
+        
+        def read():
+            # The copy as it is when this runs: a filter queued behind another one filters its result
+            if not self.source_weights or self.source_shape is None:
+                raise ValueError("Copy weights from a mesh first.")
+            return self.source_weights, mesh.adjacency(self.source_shape)
+        
+        def compute(data):
+            buffer, adjacency = data
+            values = buffer.toArray(count=len(adjacency))
+            return buffer.withValues(topology.apply(adjacency, operator, values, iterations, strength))
+        
+        def write(result):
+            self.source_weights = result
+            om.MGlobal.displayInfo("{0} copied weights success! ({1} iterations)".format(operator.capitalize(), iterations))
+            return result
+        
+        return read, compute, write
+        
+        
+    def transformWeights(self, steps):
+        # Run a transform (see expression.py) over the copied weights, all vertices at once
+        if not self.source_weights:
+            om.MGlobal.displayError("Copy weights first.")
+            return
+        try:
+            values = expression.apply(self.source_weights.toArray(), steps)
+        except ValueError as e:
+            om.MGlobal.displayError(str(e))
+            return
+        self.replaceWeights(values)
+        
+        om.MGlobal.displayInfo("Transform copied weights success!")
+        
+        
+    def replaceWeights(self, values):
+        # New copied weights, same influences, precision & metadata
+        self.source_weights = self.source_weights.withValues(values)
+        
+        
+    def mappingData(self, request, shape_dag, count, vCount):
+        # Main thread: the target mesh data mapSource() needs, (symmetry map, adjacency). Both cached per mesh.
+        if request.mirror:
+            return mesh.symmetryMap(shape_dag, request.mirror, seed=request.mirror_seed), None
+        if request.fill == "diffuse" and count < vCount:
+            return None, mesh.adjacency(shape_dag)
+        return None, None
+        
+    def warnFingerprint(self, buffer, shape_dag):
+        # Shared & imported copies carry their mesh's fingerprint. Pastes go by vertex index: warn if it's another topology.
+        expected = buffer.metadata.get("fingerprint")
+        if expected and expected != mesh.fingerprint(shape_dag):
+            om.MGlobal.displayWarning("{0} is not the mesh the weights were copied from ({1} vertices), vertex ids may not match.".format(
+                shape_dag.partialPathName(), expected.get("vertices")))
+        
+    def warnUnmatched(self, request, shape_dag, count):
+        if count:
+            om.MGlobal.displayWarning("{0}: {1} vertices have no mirror across {2}, left unchanged.".format(
+                shape_dag.partialPathName(), count, request.mirror.upper()))
+        
+    def mappedSource(self, source, request, shape_dag, vCount):
+        # Copied weights laid out on the target vertices, see mapSource()
+        mapping, adjacency = self.mappingData(request, shape_dag, len(source), vCount)
+        mapped = mapSource(source, request, vCount, mapping, adjacency)
+        self.warnUnmatched(request, shape_dag, unmatched(mapped, mapping))
+        return mapped
+
+
+def mapSource(source, request, vCount, mapping=None, adjacency=None):
+    # Copied weights laid out on the target vertices. NumPy only, safe on any thread.
+    # Mirror: gathered through the target's symmetry map. Unmatched vertices are NaN & stay as they are.
+    # Target vertices past the end of the copy get 0, or are diffused from the pasted ones.
+    if mapping is not None:
+        return symmetry.mirror(source, mapping)
+    
+    mapped = blend.mapToTarget(source, vCount)
+    if adjacency is not None:
+        fixed = np.arange(vCount) < len(source)
+        mapped = topology.diffuse(adjacency, mapped, fixed)
+    return mapped
+
+
+def unmatched(mapped, mapping):
+    # Vertices a mirror left without a value
+    if mapping is None:
+        return 0
+    return int(np.isnan(mapped.reshape(len(mapped), -1)).any(axis=1).sum())
@@ -0,0 +1,76 @@
+import importlib.util
+import os
+import unittest
+
+import numpy as np
+
+
+# blend.py is pure NumPy. Loaded by path: the package __init__ needs Maya.
+_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "Kaia_WeightTransfer", "blend.py")
+_spec = importlib.util.spec_from_file_location("blend", _PATH)
+blend = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(blend)
+
+
+class LimitInfluencesTest(unittest.TestCase):
+    def test_prune_renormalizes(self):
+        result = blend.limitInfluences([[0.05, 0.45, 0.5]], prune=0.1)
+        np.testing.assert_allclose(result, [[0.0, 0.45 / 0.95, 0.5 / 0.95]])
+
+    def test_prune_keeps_biggest_weight_of_emptied_row(self):
+        result = blend.limitInfluences([[0.25, 0.25, 0.25, 0.25]], prune=0.3)
+        np.testing.assert_allclose(result.sum(axis=1), [1.0])
+        self.assertEqual(np.count_nonzero(result), 1)
+
+        result = blend.limitInfluences([[0.1, 0.2, 0.15, 0.0]], prune=0.5)
+        np.testing.assert_allclose(result, [[0.0, 1.0, 0.0, 0.0]])
+
+    def test_prune_never_removes_locked(self):
+        locks = np.array([True, False, False])
+        result = blend.limitInfluences([[0.05, 0.05, 0.9]], prune=0.1, locks=locks)
+        np.testing.assert_allclose(result, [[0.05, 0.0, 0.95]])
+
+    def test_prune_emptied_row_with_locked_weight(self):
+        # Unlocked weights all under prune: the biggest unlocked one takes what the locked one leaves
+        locks = np.array([True, False, False])
+        result = blend.limitInfluences([[0.8, 0.08, 0.12]], prune=0.2, locks=locks)
+        np.testing.assert_allclose(result, [[0.8, 0.0, 0.2]])
+
+    def test_max_influences(self):
+        result = blend.limitInfluences([[0.1, 0.2, 0.3, 0.4]], max_influences=2)
+        np.testing.assert_allclose(result, [[0.0, 0.0, 0.3 / 0.7, 0.4 / 0.7]])
+
+    def test_max_influences_keeps_locked(self):
+        locks = np.array([True, False, False, False])
+        result = blend.limitInfluences([[0.1, 0.2, 0.3, 0.4]], max_influences=2, locks=locks)
+        np.testing.assert_allclose(result, [[0.1, 0.0, 0.0, 0.9]])
+
+    def test_untouched_rows_stay(self):
+        matrix = np.array([[0.5, 0.5, 0.0], [0.2, 0.3, 0.5]])
+        result = blend.limitInfluences(matrix, prune=0.1, max_influences=3)
+        np.testing.assert_array_equal(result, matrix)
+
+
+class NormalizeSkinTest(unittest.TestCase):
+    def test_spreads_remainder_over_unlocked(self):
+        result = blend.normalizeSkin([[0.5, 0.25, 0.25]], 0, [0.8], [False, False, False])
+        np.testing.assert_allclose(result, [[0.8, 0.1, 0.1]])
+
+    def test_locked_weight_caps_pasted_value(self):
+        result = blend.normalizeSkin([[0.2, 0.6, 0.2]], 0, [0.9], [False, True, False])
+        np.testing.assert_allclose(result, [[0.4, 0.6, 0.0]])
+
+
+class BlendTest(unittest.TestCase):
+    def test_modes_and_clamp(self):
+        old = np.array([0.5, 0.5])
+        np.testing.assert_allclose(blend.blend(np.array([0.7, 0.2]), old, "add"), [1.0, 0.7])
+        np.testing.assert_allclose(blend.blend(np.array([0.7, 0.2]), old, "add", clamp=False), [1.2, 0.7])
+        np.testing.assert_allclose(blend.blend(np.array([0.5, 2.0]), old, "scale", clamp=False), [0.25, 1.0])
+
+    def test_nan_keeps_old(self):
+        np.testing.assert_array_equal(blend.blend(np.array([np.nan, 0.3]), np.array([0.6, 0.1])), [0.6, 0.3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import importlib.util
+import os
+import unittest
+
+import numpy as np
+
+
+# topology.py is pure NumPy. Loaded by path: the package __init__ needs Maya.
+_PATH = os.path.join(os.path.dirname(__file__), os.pardir, "Kaia_WeightTransfer", "topology.py")
+_spec = importlib.util.spec_from_file_location("topology", _PATH)
+topology = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(topology)
+
+
+def triangle(isolated=1):
+    # Triangle 0 1 2, then isolated vertices
+    return topology.Adjacency.fromFaces([3], [0, 1, 2], 3 + isolated)
+
+
+class AdjacencyTest(unittest.TestCase):
+    def test_sum_with_trailing_isolated_vertex(self):
+        adjacency = triangle()
+        np.testing.assert_array_equal(adjacency.sum([1.0, 2.0, 4.0, 8.0]), [6.0, 5.0, 3.0, 0.0])
+
+    def test_reduce_keeps_isolated_values(self):
+        adjacency = topology.Adjacency([0, 0, 1, 2, 2], [2, 1])
+        np.testing.assert_array_equal(adjacency.reduce(np.maximum, [5.0, 1.0, 3.0, 7.0]), [5.0, 3.0, 1.0, 7.0])
+
+    def test_reduce_columns(self):
+        adjacency = triangle(2)
+        values = np.arange(10, dtype=np.float64).reshape(5, 2)
+        expected = np.array([[6, 8], [4, 6], [2, 4], [6, 7], [8, 9]], dtype=np.float64)
+        np.testing.assert_array_equal(adjacency.reduce(np.add, values), expected)
+
+    def test_no_edges(self):
+        adjacency = topology.Adjacency.fromFaces([], [], 3)
+        np.testing.assert_array_equal(adjacency.sum([1.0, 2.0, 3.0]), [0.0, 0.0, 0.0])
+        np.testing.assert_array_equal(adjacency.mean([1.0, 2.0, 3.0]), [1.0, 2.0, 3.0])
+
+    def test_grow_with_trailing_isolated_vertex(self):
+        grown = topology.grow(triangle(), [0.0, 0.0, 1.0, 0.5])
+        np.testing.assert_array_equal(grown, [1.0, 1.0, 1.0, 0.5])
+
+
+class DiffuseTest(unittest.TestCase):
+    def test_strip_is_linear(self):
+        # Vertices 0..5 in a line, ends fixed at 0 & 1: harmonic fill is linear
+        count = 6
+        offsets = np.zeros(count + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([1] + [2] * (count - 2) + [1])
+        neighbors = [1] + sum(([i - 1, i + 1] for i in range(1, count - 1)), []) + [count - 2]
+        adjacency = topology.Adjacency(offsets, neighbors)
+        fixed = np.zeros(count, dtype=bool)
+        fixed[[0, -1]] = True
+        values = np.zeros(count)
+        values[-1] = 1.0
+        np.testing.assert_allclose(topology.diffuse(adjacency, values, fixed), np.linspace(0, 1, count), atol=1e-6)
+
+    def test_free_vertex_with_only_fixed_neighbors(self):
+        # Fan: vertex 0 in the middle, free, every neighbor fixed. Its subgraph degree is 0.
+        adjacency = topology.Adjacency.fromFaces([3, 3, 3], [0, 1, 2, 0, 2, 3, 0, 3, 1], 5)
+        fixed = np.array([False, True, True, True, False])
+        values = np.array([0.0, 0.3, 0.6, 0.9, 0.0])
+        result = topology.diffuse(adjacency, values, fixed)
+        self.assertAlmostEqual(result[0], 0.6)
+        np.testing.assert_array_equal(result[1:], values[1:])
+
+
+if __name__ == "__main__":
+    unittest.main()